@@ -9,30 +9,47 @@
 import sys
 import xml.etree.ElementTree as ET
 import re
+import io
+import array
+import gzip
+import lzma
+import zlib
+import bisect
 import logging
+import os
+import signal
+import pickle
+import hashlib
+import json
+import atexit
+import gc
+import multiprocessing
 
 
 # === Main function ===
 def main():
 	"""Main body of the interpret"""
 	
-	filePath = processProgramArguments()
-
-	# --- Open input file ---
-	try:
-		tree = ET.ElementTree(file=filePath)
-	except IOError:
-		Error.exit(Error.file, "Opening input file error")		
-	except ET.ParseError:
-		Error.exit(Error.structure, "No element found in the file")		
-
-
-	# --- Check root node ---
-	root = tree.getroot()
+	processProgramArguments()
 
+	# --- Load program ---
+	if Options.decodeCachePath != None:
+		DecodeCache.enable(Options.decodeCachePath)
+		
+	program = Interpret.loadProgram(Options.sourcePath)
+	
+	if Options.decodeCachePath != None:
+		DecodeCache.save()
+		
+	if Options.compileLibraryPath != None:
+		Library.save(program, Options.compileLibraryPath)
+		sys.exit(0)
+		
+	if len(Options.libraryPaths) != 0:
+		program = Library.link([Library.load(path) for path in Options.libraryPaths], program)
 		
 	# --- Process instructions ---
-	Interpret.loadInstructions(root)
+	Interpret.run(program)
 	
 	
 	# --- Successful end ---
@@ -42,37 +59,219 @@ def main():
 # === Other functions ===
 def processProgramArguments():
 	"""Checks and process interpret's start parameters
-	Returns path to source file to be interpreted
+	Results are saved to class Options
 	"""
 	
 	# --- Check argument count ---
-	if len(sys.argv) != 2:
+	if len(sys.argv) < 2:
 		Error.exit(Error.argument, "Invalid argument count")
 	
 	# --- Print argument "--help" ---
 	if sys.argv[1] == "--help":
-		print("This program interprets code in language IPPcode18 parsed to XML")
+		if len(sys.argv) != 2:
+			Error.exit(Error.argument, "Argument --help can't be combined with other arguments")
+			
+		print("This program interprets code in language IPPcode18 parsed to XML or directly its source code")
 		print("Author: Jiri Furda (xfurda00)")
 		print("Usage:")
-		print("python3.6 interpret.py --source=<path to .src>")
+		print("python3.6 interpret.py --source=<path to XML or .src> [options]")
+		print("Options:")
+		print("  --checkpoint=<file>      Save execution state to file on signal SIGUSR1")
+		print("  --checkpoint-every=<N>   Save execution state also every N instructions")
+		print("  --resume=<file>          Continue from saved execution state (STDIN must be given from its beginning)")
+		print("  --trace=<file>           Write executed instructions to file (JSON Lines)")
+		print("  --trace-every=<N>        Write only every N-th traced instruction")
+		print("  --trace-opcodes=<A,B>    Trace only instructions with given opcodes")
+		print("  --trace-labels=<A,B>     Trace only instructions following given labels (up to next label)")
+		print("  --profile=<file>         Sample call stack and write it in collapsed format for flamegraph tools")
+		print("  --profile-interval=<ms>  Milliseconds of CPU time between samples (default 1)")
+		print("  -O0, -O1, -O2            Optimization level (default -O2)")
+		print("  --dump-ir                Print optimized program split to basic blocks instead of executing it")
+		print("  --break=<A,B>            Stop in debugger before instructions with given orders or after given labels")
+		print("  --step                   Stop in debugger before the first instruction")
+		print("  --debug-input=<file>     Read debugger commands from file instead of terminal")
+		print("  --state=<file>           Write final instruction counter, frames and stacks to file (JSON)")
+		print("  --compile-library=<file> Save decoded program as library instead of executing it")
+		print("  --library=<file>         Link precompiled library with the program (can be used more times)")
+		print("  --decode-cache=<file>    Reuse instructions decoded by previous runs and save them for next runs")
+		print("  --jobs=<N>               Decode XML program by N processes (default 1)")
+		print("  --reference              Run like -O0 with new frames and argument checks on every execution (used by cross check)")
 		sys.exit(0)
 		
-	# --- Load arguemnt "--source" ---
-	elif sys.argv[1][:9] == "--source=":
-		return sys.argv[1][9:]	
+	# --- Load every argument ---
+	for argument in sys.argv[1:]:
+		# -- Load arguemnt "--source" --
+		if argument[:9] == "--source=":
+			Options.sourcePath = argument[9:]
+			
+		# -- Load argument "--checkpoint" --
+		elif argument[:13] == "--checkpoint=":
+			Options.checkpointPath = argument[13:]
+			
+		# -- Load argument "--checkpoint-every" --
+		elif argument[:19] == "--checkpoint-every=":
+			Options.checkpointEvery = Options.toNumber(argument[19:])
+			
+		# -- Load argument "--resume" --
+		elif argument[:9] == "--resume=":
+			Options.resumePath = argument[9:]
+			
+		# -- Load argument "--trace" --
+		elif argument[:8] == "--trace=":
+			Options.tracePath = argument[8:]
+			
+		# -- Load argument "--trace-every" --
+		elif argument[:14] == "--trace-every=":
+			Options.traceEvery = Options.toNumber(argument[14:])
+			
+		# -- Load argument "--trace-opcodes" --
+		elif argument[:16] == "--trace-opcodes=":
+			Options.traceOpCodes = Options.toList(argument[16:].upper())
+			
+		# -- Load argument "--trace-labels" --
+		elif argument[:15] == "--trace-labels=":
+			Options.traceLabels = Options.toList(argument[15:])
+			
+		# -- Load argument "--profile" --
+		elif argument[:10] == "--profile=":
+			Options.profilePath = argument[10:]
+			
+		# -- Load argument "-O" --
+		elif argument in ("-O0", "-O1", "-O2"):
+			Options.optimize = int(argument[2])
+			
+		# -- Load argument "--dump-ir" --
+		elif argument == "--dump-ir":
+			Options.dumpIr = True
+			
+		# -- Load argument "--profile-interval" --
+		elif argument[:19] == "--profile-interval=":
+			Options.profileInterval = Options.toNumber(argument[19:])
+			
+		# -- Load argument "--break" --
+		elif argument[:8] == "--break=":
+			Options.breakpoints = Options.toList(argument[8:])
+			
+		# -- Load argument "--step" --
+		elif argument == "--step":
+			Options.step = True
+			
+		# -- Load argument "--debug-input" --
+		elif argument[:14] == "--debug-input=":
+			Options.debugInputPath = argument[14:]
+			
+		# -- Load argument "--state" --
+		elif argument[:8] == "--state=":
+			Options.statePath = argument[8:]
+			
+		# -- Load argument "--library" --
+		elif argument[:10] == "--library=":
+			Options.libraryPaths.append(argument[10:])
+			
+		# -- Load argument "--decode-cache" --
+		elif argument[:15] == "--decode-cache=":
+			Options.decodeCachePath = argument[15:]
+			
+		# -- Load argument "--jobs" --
+		elif argument[:7] == "--jobs=":
+			Options.jobs = Options.toNumber(argument[7:])
+			
+		# -- Load argument "--reference" --
+		elif argument == "--reference":
+			Options.reference = True
+			Options.optimize = 0
+			
+		# -- Load argument "--compile-library" --
+		elif argument[:18] == "--compile-library=":
+			Options.compileLibraryPath = argument[18:]
+			
+		# -- Check illegal argument --
+		else:
+			Error.exit(Error.argument, "Invalid argument")
+			
+	# --- Check required arguments ---
+	if Options.sourcePath == None:
+		Error.exit(Error.argument, "Argument --source is missing")
+		
+	if Options.checkpointEvery != 0 and Options.checkpointPath == None:
+		Error.exit(Error.argument, "Argument --checkpoint-every requires --checkpoint")
+		
+	if Options.tracePath == None and (Options.traceEvery != 1 or Options.traceOpCodes != None or Options.traceLabels != None):
+		Error.exit(Error.argument, "Arguments --trace-every, --trace-opcodes and --trace-labels require --trace")
+		
+	if Options.traceEvery == 0:
+		Error.exit(Error.argument, "Argument --trace-every must be positive")
+		
+	if Options.profileInterval == 0:
+		Error.exit(Error.argument, "Argument --profile-interval must be positive")
 		
-	# --- Check illegal argument ---
-	else:
-		Error.exit(Error.argument, "Invalid argument")
+	if Options.jobs == 0:
+		Error.exit(Error.argument, "Argument --jobs must be positive")
+		
+	if Options.decodeCachePath != None and Options.jobs > 1:
+		Error.exit(Error.argument, "Arguments --decode-cache and --jobs can't be combined")
+		
+	if Options.compileLibraryPath != None and len(Options.libraryPaths) != 0:
+		Error.exit(Error.argument, "Arguments --compile-library and --library can't be combined")
+		
+	if Options.debugInputPath != None and Options.breakpoints == None and not Options.step:
+		Error.exit(Error.argument, "Argument --debug-input requires --break or --step")
 		
 		
 # === Classes ===		
+class Options:
+	"""Class used to store interpret's start parameters"""
+	
+	sourcePath = None	# Path to the interpreted program
+	checkpointPath = None	# File where execution state is saved
+	checkpointEvery = 0	# Count of instructions between saving execution state (0 means only on signal)
+	resumePath = None	# File with execution state to continue from
+	tracePath = None	# File where executed instructions are written
+	traceEvery = 1	# Only every N-th traced instruction is written
+	traceOpCodes = None	# Set of traced opcodes (None means all of them)
+	traceLabels = None	# Set of labels whose instructions are traced (None means all of them)
+	profilePath = None	# File where sampled call stacks are written
+	profileInterval = 1	# Milliseconds of CPU time between samples
+	optimize = 2	# Optimization level (@see Passes)
+	dumpIr = False	# Print optimized program instead of executing it
+	breakpoints = None	# Set of orders and labels where debugger stops
+	step = False	# Debugger stops before the first instruction
+	debugInputPath = None	# File with debugger commands (None means terminal)
+	statePath = None	# File where final frames and stacks are written
+	libraryPaths = []	# Precompiled libraries linked before the program
+	compileLibraryPath = None	# File where program is saved as library instead of executing it
+	decodeCachePath = None	# File with decoded instructions of previous version of the program
+	jobs = 1	# Count of processes decoding XML program
+	reference = False	# Run without optimizations, frame reuse and caching of argument checks
+	
+	
+	@staticmethod
+	def toNumber(value):
+		"""Converts value of numeric argument to int"""
+		
+		if not re.search(r"^\d+$", value):
+			Error.exit(Error.argument, "Invalid numeric argument value (given {0})".format(value))
+			
+		return int(value)
+		
+		
+	@staticmethod
+	def toList(value):
+		"""Converts value of comma separated argument to set"""
+		
+		return set(item for item in value.split(",") if item != "")
+		
+		
 class Error:
 	"""Class used to store error codes and to print them"""
 	
 	# Input errors
 	argument = 10
 	file = 11
+	output = 12
+	
+	# IPPcode18 source errors (@see parse.php)
+	source = 21
 	
 	# Pre-run errors
 	structure = 31
@@ -91,11 +290,27 @@ class Error:
 	custom = 59
 	internal = 99
 	
+	deferred = False	# Raise Error.Deferred instead of ending (used by worker processes)
 	
+	
+	class Deferred(Exception):
+		"""Error passed to the main process to be reported there"""
+		
+		def __init__(self, code, msg):
+			"""Saves return code and message"""
+			
+			super().__init__(code, msg)
+			self.code = code
+			self.msg = msg
+			
+			
 	@staticmethod
 	def exit(code, msg):
 		"""Prints error message to STDERR and ends with defined return code"""
 		
+		if Error.deferred:
+			raise Error.Deferred(code, msg)
+			
 		print("ERROR: {0}".format(msg), file=sys.stderr)
 		sys.exit(code)
 		
@@ -107,8 +322,71 @@ class Frames:
 	localFrame = None
 	temporaryFrame = None
 	stack = []	# Stack used to store temporary frames when PUSHFRAME and POPFRAME is called	
+	pool = []	# Discarded temporary frames ready to be reused by CREATEFRAME
+	reuse = True	# Discarded frames are put to the pool (disabled for reference run)
 	
 	
+	@classmethod
+	def create(cls):
+		"""Returns empty frame for CREATEFRAME, reused from the pool when possible"""
+		
+		if len(cls.pool) != 0:
+			return cls.pool.pop()
+			
+		return {}
+		
+		
+	@classmethod
+	def release(cls, frame):
+		"""Returns discarded frame to the pool"""
+		
+		if cls.reuse:
+			frame.clear()	# Costs only the variables of the frame, not of the whole program
+			cls.pool.append(frame)
+		
+		
+	@classmethod
+	def lookup(cls, name):
+		"""Returns value of variable without ending on error
+		Returns None when variable or its frame doesn't exist or when it isn't initialized
+		"""
+		
+		frame = cls.__lookupFrame(name)
+		if frame == None:
+			return None
+			
+		return frame.get(name[3:])
+		
+		
+	@classmethod
+	def exists(cls, name):
+		"""Returns True when variable is defined in existing frame (without ending on error)"""
+		
+		frame = cls.__lookupFrame(name)
+		return frame != None and name[3:] in frame
+		
+		
+	@classmethod
+	def __lookupFrame(cls, name):
+		"""Returns frame defined in variable name or None when it doesn't exist"""
+		
+		if name[:3] == "GF@":
+			return cls.globalFrame
+		elif name[:3] == "LF@":
+			return cls.localFrame
+		elif name[:3] == "TF@":
+			return cls.temporaryFrame
+			
+		return None
+		
+		
+	@staticmethod
+	def variables(frame):
+		"""Returns dict of variables defined in the frame"""
+		
+		return dict(frame)
+		
+		
 	@classmethod
 	def add(cls, name):
 		"""Creates new variable in the frame defined in its name"""
@@ -162,12 +440,12 @@ class Frames:
 		# --- Check if exists ---
 		if name not in frame:
 			Error.exit(Error.varExistence, "Variable '{0}' does not exist".format(name))
-		
+			
 		# --- Get value from frame ---
 		result = frame[name]
 		
 		# --- Check if initialized ---
-		if type(result) == type(None):
+		if result is None:
 			Error.exit(Error.missingValue, "Tried to get non-initilaized value")
 		
 		# --- Result ---
@@ -233,8 +511,8 @@ class Labels:
 	
 	
 	@classmethod	
-	def add(cls, name):
-		"""Saves new label and its value"""
+	def add(cls, name, order=None):
+		"""Saves new label and its value (order of LABEL instruction, current instruction by default)"""
 		
 		# --- Convert type label to str ---
 		name = str(name)	
@@ -244,7 +522,7 @@ class Labels:
 			Error.exit(Error.semantic, "Label '{0}' already exists".format(name))
 			
 		# --- Save label ---
-		cls.labels[name] = Interpret.instrOrder
+		cls.labels[name] = Interpret.instrOrder if order == None else order
 	
 	
 	@classmethod	
@@ -262,6 +540,435 @@ class Labels:
 		Interpret.instrOrder = cls.labels[name]
 		
 		
+class Checkpoint:
+	"""Class used to save execution state of the interpret to file and to restore it"""
+	
+	path = None	# File where execution state is saved
+	countdown = 0	# Instructions left until next save (never reaches 0 when saving only on signal)
+	every = 0
+	requested = False	# Set by signal SIGUSR1
+	
+	
+	@classmethod
+	def enable(cls, path, every):
+		"""Starts saving execution state every N instructions and on signal SIGUSR1"""
+		
+		cls.path = path
+		cls.every = every
+		cls.countdown = every
+		
+		signal.signal(signal.SIGUSR1, cls.__request)
+		Interpret.hooks.append(cls.hook)
+		
+		
+	@classmethod
+	def __request(cls, signum, frame):
+		"""Signal handler, state is saved after currently executed instruction"""
+		
+		cls.requested = True
+		
+		
+	@classmethod
+	def hook(cls, instruction):
+		"""Called before every executed instruction"""
+		
+		cls.countdown = cls.countdown-1
+		
+		if cls.countdown == 0 or cls.requested == True:
+			cls.save()
+			
+			
+	@classmethod
+	def save(cls):
+		"""Saves execution state to the file"""
+		
+		cls.requested = False
+		cls.countdown = cls.every
+		
+		# --- Collect state ---
+		state = (
+			cls.sourceHash(),
+			Interpret.instrOrder,
+			Interpret.inputLines,
+			Frames.globalFrame,
+			Frames.localFrame,	# Pickle keeps LF as reference to the top of the frame stack
+			Frames.temporaryFrame,
+			Frames.stack,
+			Interpret.valStack.content,
+			Interpret.callStack.content
+		)
+		
+		# --- Write state (old checkpoint is replaced only when new one is complete) ---
+		tmpPath = cls.path+".tmp"
+		try:
+			with open(tmpPath, "wb") as file:
+				pickle.dump(state, file, pickle.HIGHEST_PROTOCOL)
+			os.replace(tmpPath, cls.path)
+		except OSError:
+			Error.exit(Error.output, "Couldn't write checkpoint file")
+			
+			
+	@classmethod
+	def restore(cls, path):
+		"""Loads execution state from the file"""
+		
+		# --- Read state ---
+		try:
+			with open(path, "rb") as file:
+				state = pickle.load(file)
+		except OSError:
+			Error.exit(Error.file, "Opening checkpoint file error")
+		except (pickle.UnpicklingError, EOFError, ValueError, TypeError):
+			Error.exit(Error.file, "Invalid checkpoint file")
+			
+		if type(state) != tuple or len(state) != 9:
+			Error.exit(Error.file, "Invalid checkpoint file")
+			
+		# --- Check if state belongs to this program ---
+		if state[0] != cls.sourceHash():
+			Error.exit(Error.file, "Checkpoint was saved for different source file")
+			
+		# --- Set state ---
+		(_, Interpret.instrOrder, inputLines, Frames.globalFrame, Frames.localFrame,
+			Frames.temporaryFrame, Frames.stack, Interpret.valStack.content, Interpret.callStack.content) = state
+			
+		# --- Skip already read input ---
+		for i in range(inputLines):
+			sys.stdin.readline()
+		Interpret.inputLines = inputLines
+		
+		
+	@staticmethod
+	def sourceHash():
+		"""Returns hash of interpreted source file and of linked libraries"""
+		
+		sourceHash = hashlib.sha1()
+		try:
+			for path in [Options.sourcePath] + Options.libraryPaths:
+				with open(path, "rb") as file:
+					sourceHash.update(file.read())
+		except OSError:
+			Error.exit(Error.file, "Opening input file error")
+			
+		return sourceHash.hexdigest()
+			
+			
+class Trace:
+	"""Class used to write executed instructions to file in JSON Lines format"""
+	
+	file = None
+	every = 1	# Only every N-th traced instruction is written
+	countdown = 1	# Traced instructions left until next write
+	selected = None	# Value 1 for every instruction which can be traced
+	
+	
+	@classmethod
+	def enable(cls, path, every, opCodes, labels):
+		"""Starts writing executed instructions to the file"""
+		
+		# --- Open file ---
+		try:
+			cls.file = open(path, "w", buffering=1024*1024)
+		except OSError:
+			Error.exit(Error.output, "Couldn't open trace file")
+			
+		atexit.register(cls.file.close)
+		
+		# --- Select traced instructions ---
+		program = Interpret.program
+		cls.selected = bytearray(len(program))
+		currentLabel = None
+		
+		for index in range(len(program)):
+			opCode = program.getOpCode(index)
+			if opCode == "LABEL":
+				currentLabel = str(program.getArgs(index)[0])
+				
+			if (opCodes == None or opCode in opCodes) and (labels == None or currentLabel in labels):
+				cls.selected[index] = 1
+				
+		# --- Start tracing ---
+		cls.every = every
+		cls.countdown = every
+		Interpret.hooks.append(cls.hook)
+		
+		
+	@classmethod
+	def hook(cls, instruction):
+		"""Called before every executed instruction"""
+		
+		if not cls.selected[instruction.index]:
+			return
+			
+		# --- Sampling ---
+		cls.countdown = cls.countdown-1
+		if cls.countdown != 0:
+			return
+		cls.countdown = cls.every
+		
+		# --- Write record ---
+		record = {
+			"order": instruction.index+1,
+			"opcode": instruction.opCode,
+			"args": [cls.__resolve(arg) for arg in instruction.args],
+			"stack": len(Interpret.valStack.content),
+			"calls": len(Interpret.callStack.content),
+			"frames": len(Frames.stack)
+		}
+		cls.file.write(json.dumps(record) + "\n")
+		
+		
+	@staticmethod
+	def __resolve(arg):
+		"""Returns value of the argument which can be written to JSON"""
+		
+		if type(arg) == var:
+			return Frames.lookup(arg.getName())	# None also for undefined variable
+			
+		if type(arg) == label:
+			return str(arg)
+			
+		return arg
+		
+		
+class Profiler:
+	"""Class used to sample IPPcode18 call stack and to write it in collapsed format (for flamegraph tools)"""
+	
+	path = None
+	samples = {}	# Count of samples by call stack (tuple of return addresses)
+	
+	
+	@classmethod
+	def enable(cls, path, interval):
+		"""Starts sampling call stack every interval milliseconds of CPU time"""
+		
+		cls.path = path
+		cls.samples = {}
+		
+		signal.signal(signal.SIGPROF, cls.__sample)
+		signal.setitimer(signal.ITIMER_PROF, interval/1000, interval/1000)
+		atexit.register(cls.write)
+		
+		
+	@classmethod
+	def __sample(cls, signum, frame):
+		"""Signal handler, saves current call stack"""
+		
+		stack = tuple(Interpret.callStack.content)
+		cls.samples[stack] = cls.samples.get(stack, 0)+1
+		
+		
+	@classmethod
+	def write(cls):
+		"""Writes every sampled call stack with its count (e.g. "main;foo;bar 12")"""
+		
+		signal.setitimer(signal.ITIMER_PROF, 0)
+		
+		# --- Collapse stacks by function names ---
+		collapsed = {}
+		for stack, count in cls.samples.items():
+			names = ";".join(["main"] + [cls.__function(address) for address in stack])
+			collapsed[names] = collapsed.get(names, 0)+count
+			
+		# --- Write file ---
+		try:
+			with open(cls.path, "w") as file:
+				for names in sorted(collapsed):
+					file.write("{0} {1}\n".format(names, collapsed[names]))
+		except OSError:
+			Error.exit(Error.output, "Couldn't write profile file")
+			
+			
+	@staticmethod
+	def __function(address):
+		"""Returns label called by CALL instruction with given order"""
+		
+		program = Interpret.program
+		if 1 <= address <= len(program) and program.getOpCode(address-1) == "CALL":
+			return str(program.getArgs(address-1)[0])
+			
+		return "?"
+		
+		
+class Debugger:
+	"""Class used to stop execution at breakpoints and to step through instructions interactively"""
+	
+	commands = None	# File debugger commands are read from
+	breakpoints = None	# Value 1 for every instruction execution stops before
+	stepping = False	# Stop before next instruction
+	
+	
+	@classmethod
+	def enable(cls, breakpoints, step, path):
+		"""Starts stopping execution before given instructions (orders or labels) or before every one of them"""
+		
+		# --- Open commands ---
+		try:
+			cls.commands = open(path if path != None else "/dev/tty")
+		except OSError:
+			Error.exit(Error.file, "Couldn't open debugger input")
+			
+		# --- Find breakpoints ---
+		cls.breakpoints = bytearray(len(Interpret.program))
+		for breakpoint in breakpoints:
+			index = cls.__findBreakpoint(breakpoint)
+			if index == None:
+				Error.exit(Error.argument, "Invalid breakpoint (given {0})".format(breakpoint))
+			cls.breakpoints[index] = 1
+			
+		# --- Start debugging ---
+		cls.stepping = step
+		Interpret.hooks.append(cls.hook)
+		
+		
+	@classmethod
+	def hook(cls, instruction):
+		"""Called before every executed instruction"""
+		
+		if cls.stepping or cls.breakpoints[instruction.index]:
+			cls.stop(instruction)
+			
+			
+	@classmethod
+	def stop(cls, instruction):
+		"""Reads and executes debugger commands until execution continues"""
+		
+		print("Stopped before {0}".format(cls.__describe(instruction)), file=sys.stderr)
+		
+		while True:
+			print("(debug) ", end="", file=sys.stderr, flush=True)
+			line = cls.commands.readline()
+			
+			# -- End of commands continues without stopping --
+			if line == "":
+				cls.stepping = False
+				cls.breakpoints = bytearray(len(cls.breakpoints))
+				return
+				
+			words = line.split()
+			command = words[0] if len(words) != 0 else "step"	# Empty line steps
+			
+			# -- Continue execution --
+			if command in ("s", "step"):
+				cls.stepping = True
+				return
+			elif command in ("c", "continue"):
+				cls.stepping = False
+				return
+				
+			# -- Inspect state --
+			elif command in ("p", "print"):
+				cls.dump(sys.stderr)
+				
+			# -- Change breakpoints --
+			elif command in ("b", "break", "d", "delete") and len(words) == 2:
+				index = cls.__findBreakpoint(words[1])
+				if index == None:
+					print("Invalid breakpoint", file=sys.stderr)
+				else:
+					cls.breakpoints[index] = command in ("b", "break")
+					
+			# -- End program --
+			elif command in ("q", "quit"):
+				sys.exit(0)
+				
+			else:
+				print("Commands: step, continue, print, break <order|label>, delete <order|label>, quit", file=sys.stderr)
+				
+				
+	@staticmethod
+	def dump(file):
+		"""Writes instruction counter, frames and stacks (used by BREAK and command print)"""
+		
+		program = Interpret.program
+		order = Interpret.instrOrder
+		opCode = program.getOpCode(order-1) if 1 <= order <= len(program) else "-"
+		
+		file.write("Instruction counter: {0} ({1})\n".format(order, opCode))
+		file.write("Global frame: {0}\n".format(Debugger.__formatFrame(Frames.globalFrame)))
+		file.write("Local frame: {0}\n".format(Debugger.__formatFrame(Frames.localFrame)))
+		file.write("Temporary frame: {0}\n".format(Debugger.__formatFrame(Frames.temporaryFrame)))
+		file.write("Frame stack: {0}\n".format(" | ".join(Debugger.__formatFrame(frame) for frame in Frames.stack)))
+		file.write("Data stack: {0}\n".format(", ".join(Debugger.format(value) for value in Interpret.valStack.content)))
+		file.write("Call stack: {0}\n".format(", ".join(str(order) for order in Interpret.callStack.content)))
+		
+		
+	@staticmethod
+	def save(path):
+		"""Writes instruction counter, frames and stacks to file in JSON format (used by --state at exit)"""
+		
+		frame = lambda frame: None if frame == None else Frames.variables(frame)
+		state = {
+			"order": Interpret.instrOrder,
+			"GF": frame(Frames.globalFrame),
+			"LF": frame(Frames.localFrame),
+			"TF": frame(Frames.temporaryFrame),
+			"frames": [frame(item) for item in Frames.stack],
+			"stack": Interpret.valStack.content,
+			"calls": Interpret.callStack.content
+		}
+		
+		try:
+			with open(path, "w") as file:
+				json.dump(state, file, sort_keys=True)
+		except OSError:
+			Error.exit(Error.output, "Couldn't write state file")
+			
+			
+	@staticmethod
+	def format(value):
+		"""Returns value in the form used by IPPcode18 source code"""
+		
+		if value == None:
+			return "(uninitialized)"
+			
+		if type(value) == bool:
+			return "bool@true" if value else "bool@false"
+			
+		if type(value) == int:
+			return "int@{0}".format(value)
+			
+		return "string@"+"".join(char if char.isprintable() and char not in " #\\" else "\\{0:03d}".format(ord(char)) for char in value)
+		
+		
+	@staticmethod
+	def __formatFrame(frame):
+		"""Returns defined variables of the frame"""
+		
+		if frame == None:
+			return "(undefined)"
+			
+		return "{" + ", ".join("{0}={1}".format(name, Debugger.format(value)) for name, value in sorted(Frames.variables(frame).items())) + "}"
+		
+		
+	@staticmethod
+	def __describe(instruction):
+		"""Returns order, opCode and arguments of the instruction"""
+		
+		words = [str(instruction.index+1), instruction.opCode]
+		for arg in instruction.args:
+			words.append(arg.name if type(arg) in (var, label) else Debugger.format(arg))
+			
+		return " ".join(words)
+		
+		
+	@staticmethod
+	def __findBreakpoint(breakpoint):
+		"""Returns index of instruction with given order or of first instruction after given label"""
+		
+		if breakpoint.isdigit():
+			index = int(breakpoint)-1
+		elif breakpoint in Labels.labels:
+			index = Labels.labels[breakpoint]	# Jumps continue after LABEL instruction
+		else:
+			return None
+			
+		if not 0 <= index < len(Interpret.program):
+			return None
+			
+		return index
+		
+		
 class var:
 	"""Class representing IPPcode18 type var"""
 	
@@ -342,19 +1049,1005 @@ class label:
 		return self.name
 				
 	
-class Interpret():
-	"""Main class of this program. It represents the interpret itself"""
+class Loops:
+	"""Class used to recognize simple counting loops and to compute their effect at once
 	
-	instrOrder = 1	# Defines order number of instruction which is currently loaded
-	valStack = Stack()	# Used by POPS and PUSHS
-	callStack = Stack()	# Used by CALL and RETURN
+	Accelerated loops have only ADD/SUB of a variable and int constant to the same variable and
+	MOVE of a constant in their body, ending with a test of one of the counters against int constant:
+	  LABEL loop; <body>; JUMPIFNEQ loop <counter> int@N
+	  LABEL loop; JUMPIFEQ end <counter> int@N; <body>; JUMP loop
+	"""
 	
-	@staticmethod		
-	def checkRoot(root):
-		"""Checks if root node is valid"""
+	loops = {}	# Loop description by index of its LABEL (index of the last instruction of the loop is the last item)
+	
+	
+	@classmethod
+	def find(cls, program):
+		"""Search every counting loop in the program"""
 		
-		if root.tag != "program":
-			Error.exit(Error.structure, "Root node <program> not found")
+		cls.loops = {}
+		
+		for index in program.indexes(("LABEL",)):
+			name = str(program.getArgs(index)[0])
+			
+			# --- Test at the end of the loop ---
+			loop = cls.__loadBody(program, index+1)
+			if loop != None:
+				testIndex, steps, moves = loop
+				test = cls.__loadTest(program, testIndex, "JUMPIFNEQ", name)
+				if test != None and test[0] in steps:
+					cls.loops[index] = (testIndex, test[0], test[1], steps, moves, True, testIndex)
+					continue
+					
+			# --- Test at the beginning of the loop ---
+			if index+1 < len(program) and program.getOpCode(index+1) == "JUMPIFEQ":
+				test = cls.__loadTest(program, index+1, "JUMPIFEQ", None)
+				loop = cls.__loadBody(program, index+2)
+				if test != None and loop != None:
+					jumpIndex, steps, moves = loop
+					if test[0] in steps and cls.__isJump(program, jumpIndex, name):
+						cls.loops[index] = (index+1, test[0], test[1], steps, moves, False, jumpIndex)
+						
+						
+	@staticmethod
+	def __isJump(program, index, name):
+		"""Checks if instruction at index is JUMP to label name (body can end with the end of the program)"""
+		
+		if index >= len(program) or program.getOpCode(index) != "JUMP":
+			return False
+			
+		args = program.getArgs(index)
+		return len(args) == 1 and type(args[0]) == label and str(args[0]) == name
+		
+		
+	@staticmethod
+	def __loadBody(program, index):
+		"""Loads body of the loop starting at index
+		Returns index of first instruction after the body, steps of counters and constants of MOVE
+		"""
+		
+		steps = {}	# Value added to counter in one pass by its name
+		moves = {}	# Constant saved by MOVE by name of variable
+		
+		while index < len(program):
+			opCode = program.getOpCode(index)
+			args = program.getArgs(index)
+			
+			# --- ADD/SUB of int constant to the same variable ---
+			if opCode in ("ADD", "SUB") and len(args) == 3 and type(args[0]) == var:
+				name = args[0].getName()
+				if type(args[1]) == var and args[1].getName() == name and type(args[2]) == int:
+					step = args[2]
+				elif opCode == "ADD" and type(args[2]) == var and args[2].getName() == name and type(args[1]) == int:
+					step = args[1]
+				else:
+					return None
+					
+				if opCode == "SUB":
+					step = -step
+				steps[name] = steps.get(name, 0) + step
+				
+			# --- MOVE of constant ---
+			elif opCode == "MOVE" and len(args) == 2 and type(args[0]) == var and type(args[1]) in (int, str, bool):
+				moves[args[0].getName()] = args[1]
+				
+			else:
+				break
+				
+			index = index+1
+			
+		# --- Counters can't be changed by MOVE ---
+		for name in moves:
+			if name in steps:
+				return None
+				
+		if len(steps) == 0:
+			return None
+			
+		return index, steps, moves
+		
+		
+	@staticmethod
+	def __loadTest(program, index, opCode, name):
+		"""Loads conditional jump comparing variable with int constant (to label name when given)
+		Returns name of the variable and the constant
+		"""
+		
+		if index >= len(program) or program.getOpCode(index) != opCode:
+			return None
+			
+		args = program.getArgs(index)
+		if len(args) != 3 or type(args[0]) != label or (name != None and str(args[0]) != name):
+			return None
+			
+		if type(args[1]) == var and type(args[2]) == int:
+			return args[1].getName(), args[2]
+		if type(args[2]) == var and type(args[1]) == int:
+			return args[2].getName(), args[1]
+			
+		return None
+		
+		
+	@classmethod
+	def enter(cls, index):
+		"""Called when LABEL instruction is reached, computes every pass of the loop at once
+		Loops which could end with error or never end are left to normal execution
+		"""
+		
+		loop = cls.loops.get(index)
+		if loop == None:
+			return
+			
+		testIndex, counter, limit, steps, moves, testAtEnd, end = loop
+		
+		# --- Every counter must be int ---
+		values = {}
+		for name in steps:
+			value = Frames.lookup(name)
+			if type(value) != int:
+				return
+			values[name] = value
+			
+		# --- Every variable set by MOVE must exist ---
+		for name in moves:
+			if not Frames.exists(name):
+				return
+				
+		# --- Count passes of the body ---
+		step = steps[counter]
+		distance = limit - values[counter]
+		if step == 0 or distance % step != 0:
+			return	# Loop never ends
+			
+		passes = distance // step
+		if passes < 0 or (testAtEnd and passes == 0):
+			return	# Loop never ends
+			
+		if passes == 0:
+			return	# Loop is left by its test
+			
+		# --- Save results ---
+		for name in steps:
+			Frames.set(name, values[name] + passes*steps[name])
+			
+		for name in moves:
+			Frames.set(name, moves[name])
+			
+		# --- Continue by the test which ends the loop ---
+		Interpret.instrOrder = testIndex	# Instruction with order testIndex+1 is executed next
+		
+		
+class Types:
+	"""Class used to infer types of global variables and to run instructions using them without type checks
+	
+	Variable has known type when every instruction saving value to it saves value of the same type
+	(e.g. counter set by MOVE GF@i int@0 and changed only by ADD). Variables of LF and TF are
+	never typed because the same name is used by different frames.
+	"""
+	
+	# Type of result saved by instructions
+	resultTypes = {
+		"ADD": int, "SUB": int, "MUL": int, "IDIV": int, "STRLEN": int, "STRI2INT": int,
+		"CONCAT": str, "GETCHAR": str, "SETCHAR": str, "INT2CHAR": str, "TYPE": str,
+		"LT": bool, "EQ": bool, "GT": bool, "AND": bool, "OR": bool, "NOT": bool
+	}
+	
+	# Types of operands required by instructions with typed variant (None means both of the same type)
+	operandTypes = {
+		"ADD": int, "SUB": int, "MUL": int, "IDIV": int, "CONCAT": str,
+		"LT": None, "EQ": None, "GT": None, "JUMPIFEQ": None, "JUMPIFNEQ": None
+	}
+	
+	types = {}	# Known type of global variable by its name
+	
+	
+	@classmethod
+	def infer(cls, program):
+		"""Search types of global variables
+		Each variable gets its type at most twice (first type and conflict), so the propagation is linear
+		"""
+		
+		starts, kinds, values, pool = program.argStarts, program.argKinds, program.argValues, program.pool
+		varKind = Program.kinds[var]
+		valueTypes = {Program.kinds[int]: int, Program.kinds[str]: str, Program.kinds[bool]: bool}
+		readTypes = {"int": int, "string": str, "bool": bool}
+		codes = {code: name for code, name in enumerate(Instruction.opCodeNames) if name in cls.resultTypes or name in ("MOVE", "READ", "POPS")}
+		
+		# --- Collect types saved to every variable ---
+		found = {}	# Type of global variable by its name (None means unknown or more types)
+		movedInto = {}	# Names of global variables given by MOVE the value of variable by its name
+		
+		def save(name, source):
+			"""Merges source type to the type of the variable, returns True when it changed"""
+			
+			if name not in found:
+				found[name] = source
+			elif found[name] != None and found[name] != source:
+				found[name] = None
+			else:
+				return False
+			return True
+			
+		for index in program.codeIndexes(codes):
+			start = starts[index]
+			count = starts[index+1]-start
+			if count == 0 or kinds[start] != varKind:
+				continue
+				
+			name = pool[values[start]].name
+			if name[:3] != "GF@":
+				continue	# LF and TF are never typed
+				
+			opCode = codes[program.opCodes[index]]
+			if opCode in cls.resultTypes:
+				save(name, cls.resultTypes[opCode])
+			elif opCode == "MOVE" and count == 2:
+				if kinds[start+1] == varKind:
+					source = pool[values[start+1]].name
+					if source[:3] == "GF@":
+						movedInto.setdefault(source, []).append(name)
+					else:
+						save(name, None)
+				else:
+					save(name, valueTypes.get(kinds[start+1]))
+			elif opCode == "READ" and count == 2:
+				save(name, readTypes.get(pool[values[start+1]]))
+			elif opCode == "POPS":
+				save(name, None)	# Unknown type
+				
+		# --- Propagate types through MOVE (variable without value can't be moved) ---
+		work = [name for name in movedInto if name in found]
+		while len(work) != 0:
+			source = work.pop()
+			for name in movedInto.get(source, ()):
+				if save(name, found[source]):
+					work.append(name)
+					
+		# --- Keep only variables with one type ---
+		cls.types = {name: nameType for name, nameType in found.items() if nameType != None}
+		
+		
+	@classmethod
+	def specialize(cls, program):
+		"""Changes instructions with operands of known types to their variants without type checks"""
+		
+		cls.infer(program)
+		
+		starts, kinds, values, pool = program.argStarts, program.argKinds, program.argValues, program.pool
+		varKind, labelKind = Program.kinds[var], Program.kinds[label]
+		valueTypes = {Program.kinds[int]: int, Program.kinds[str]: str, Program.kinds[bool]: bool}
+		codes = {code: name for code, name in enumerate(Instruction.opCodeNames) if name in cls.operandTypes}
+		
+		def operandType(position):
+			"""Returns known type of the operand or None"""
+			
+			if kinds[position] == varKind:
+				return cls.types.get(pool[values[position]].name)
+				
+			return valueTypes.get(kinds[position])
+			
+		for index in program.codeIndexes(codes):
+			opCode = codes[program.opCodes[index]]
+			start = starts[index]
+			if starts[index+1]-start != 3:
+				continue
+				
+			# --- Check result or label ---
+			expectedFirst = labelKind if opCode[:4] == "JUMP" else varKind
+			if kinds[start] != expectedFirst:
+				continue
+				
+			# --- Check operands ---
+			typeA = operandType(start+1)
+			typeB = operandType(start+2)
+			expected = cls.operandTypes[opCode]
+			
+			if typeA == None or typeA != typeB or (expected != None and typeA != expected):
+				continue
+				
+			program.specialize(index, Instruction.typedCodes[opCode])
+			
+			
+class ControlFlowGraph:
+	"""Class splitting program to basic blocks connected by possible jumps"""
+	
+	jumps = ("JUMP", "JUMPIFEQ", "JUMPIFNEQ", "JUMPIFEQS", "JUMPIFNEQS", "CALL")
+	
+	
+	def __init__(self, program):
+		"""Creates blocks and edges of the program"""
+		
+		count = len(program)
+		
+		# --- Find labels ---
+		labels = {}
+		labelIndexes = program.indexes(("LABEL",))
+		for index in labelIndexes:
+			labels.setdefault(str(program.getArgs(index)[0]), index)
+			
+		# --- Find first instructions of blocks ---
+		jumpIndexes = program.indexes(self.jumps + ("RETURN",))
+		returnSites = [index+1 for index in program.indexes(("CALL",))]	# Instructions following CALL
+		leaders = set(labelIndexes)
+		leaders.update(index+1 for index in jumpIndexes)
+		leaders.update((0, program.entry))	# Main program starts after linked libraries
+		
+		# --- Create blocks ---
+		self.starts = array.array("I", sorted(leader for leader in leaders if leader < count))	# First instruction of every block
+		self.count = count
+		
+		# --- Create edges ---
+		self.edgeStarts = array.array("I", [0])	# Edges of block N are at edgeStarts[N]:edgeStarts[N+1]
+		self.edgeTargets = array.array("I")	# Number of following block of every edge
+		for number in range(len(self.starts)):
+			start, end = self.getBlock(number)
+			last = end-1
+			opCode = program.getOpCode(last)
+			following = set()
+			
+			if opCode in self.jumps:
+				args = program.getArgs(last)
+				target = labels.get(args[0].name) if len(args) != 0 and type(args[0]) == label else None	# Invalid operands are reported when executed
+				if target != None:
+					following.add(self.blockOf(target))
+					
+			if opCode == "RETURN":
+				following.update(self.blockOf(site) for site in returnSites if site < count)
+			elif opCode != "JUMP" and end < count:
+				following.add(number+1)
+				
+			self.edgeTargets.extend(sorted(following))
+			self.edgeStarts.append(len(self.edgeTargets))
+			
+			
+	def __len__(self):
+		"""Returns count of blocks"""
+		
+		return len(self.starts)
+		
+		
+	def getBlock(self, number):
+		"""Returns index of first and index after last instruction of the block"""
+		
+		if number+1 < len(self.starts):
+			return self.starts[number], self.starts[number+1]
+			
+		return self.starts[number], self.count
+		
+		
+	def getEdges(self, number):
+		"""Returns list of numbers of blocks following the block"""
+		
+		return list(self.edgeTargets[self.edgeStarts[number]:self.edgeStarts[number+1]])
+		
+		
+	def blockOf(self, index):
+		"""Returns number of block containing the instruction"""
+		
+		return bisect.bisect_right(self.starts, index)-1
+		
+		
+class Passes:
+	"""Class running optimization passes by optimization level
+	
+	-O0 executes program as it is loaded
+	-O1 uses instructions without type checks for operands of known type (@see Types)
+	-O2 also computes simple counting loops at once (@see Loops)
+	"""
+	
+	passes = []	# Level, name, function (program, graph) and use of graph of every registered pass
+	
+	
+	@classmethod
+	def register(cls, level, name, function, usesGraph=False):
+		"""Adds pass run on given and higher optimization levels
+		Function gets control flow graph of the program only when it uses it (None otherwise)
+		"""
+		
+		cls.passes.append((level, name, function, usesGraph))
+		
+		
+	@classmethod
+	def run(cls, program, level):
+		"""Runs every pass of the optimization level and verifies program after each of them
+		Program without scheduled passes isn't verified, graph is built only for passes which use it
+		"""
+		
+		scheduled = [(name, function, usesGraph) for passLevel, name, function, usesGraph in cls.passes if passLevel <= level]
+		if len(scheduled) == 0:
+			return
+			
+		graph = None
+		if any(usesGraph for name, function, usesGraph in scheduled):
+			graph = ControlFlowGraph(program)
+			
+		cls.verify(program, graph, "loading")
+		for name, function, usesGraph in scheduled:
+			function(program, graph)
+			cls.verify(program, graph, name)
+				
+				
+	@staticmethod
+	def verify(program, graph, name):
+		"""Checks consistency of the program and its graph (when it's built), ends with internal error when broken"""
+		
+		count = len(program)
+		
+		# --- Columns ---
+		if (len(program.argStarts) != count+1 or len(program.checked) != count
+				or program.argStarts[-1] != len(program.argValues) or len(program.argKinds) != len(program.argValues)):
+			Error.exit(Error.internal, "Invalid program columns after {0}".format(name))
+			
+		if len(program.argValues) != 0 and max(program.argValues) >= len(program.pool):
+			Error.exit(Error.internal, "Argument out of pool after {0}".format(name))
+			
+		# --- Instructions ---
+		if count != 0 and max(program.opCodes) >= len(Instruction.codeHandlers):
+			Error.exit(Error.internal, "Invalid instruction code after {0}".format(name))
+			
+		# -- Variants without type checks need checked arguments --
+		starts, kinds, labelKind = program.argStarts, program.argKinds, Program.kinds[label]
+		invalid = [index for index in program.codeIndexes(range(len(Instruction.handlers), len(Instruction.codeHandlers)))
+			if starts[index+1]-starts[index] != 3 or kinds[starts[index]] > labelKind
+			or kinds[starts[index]+1] == labelKind or kinds[starts[index]+2] == labelKind]
+		if len(invalid) != 0:
+			Error.exit(Error.internal, "Invalid typed instruction #{0} after {1}".format(invalid[0]+1, name))
+				
+		# --- Graph ---
+		if graph != None:
+			if len(graph.starts) != 0 and (graph.starts[0] != 0 or graph.starts[-1] >= count):
+				Error.exit(Error.internal, "Blocks don't cover the program after {0}".format(name))
+				
+			if count != 0 and len(graph.edgeStarts) != len(graph.starts)+1:
+				Error.exit(Error.internal, "Invalid edges after {0}".format(name))
+				
+			if len(graph.edgeTargets) != 0 and max(graph.edgeTargets) >= len(graph):
+				Error.exit(Error.internal, "Invalid edges after {0}".format(name))
+			
+		# --- Loops ---
+		for index, loop in Loops.loops.items():
+			if program.getOpCode(index) != "LABEL" or not index < loop[0] < count:
+				Error.exit(Error.internal, "Invalid loop at #{0} after {1}".format(index+1, name))
+				
+				
+	@staticmethod
+	def dump(program, file):
+		"""Prints program split to basic blocks"""
+		
+		graph = ControlFlowGraph(program)
+		
+		for number in range(len(graph)):
+			start, end = graph.getBlock(number)
+			edges = ", ".join(str(edge) for edge in graph.getEdges(number))
+			file.write("block {0} (orders {1}-{2}) -> [{3}]\n".format(number, start+1, end, edges))
+			
+			for index in range(start, end):
+				words = [str(index+1), program.getOpCode(index)]
+				for kind, arg in zip(program.getArgKinds(index), program.getArgs(index)):
+					words.append(Passes.__formatArg(kind, arg))
+					
+				# -- Results of passes --
+				if program.opCodes[index] >= len(Instruction.handlers):
+					words.append("; typed")
+				if index in Loops.loops:
+					words.append("; counting loop to order {0}".format(Loops.loops[index][-1]+1))
+					
+				file.write("  {0}\n".format(" ".join(words)))
+				
+				
+	@staticmethod
+	def __formatArg(kind, arg):
+		"""Returns argument in the form used by IPPcode18 source code"""
+		
+		if type(arg) == var or type(arg) == label:
+			return arg.name
+			
+		if kind == Program.typeKind:
+			return arg
+			
+		return Debugger.format(arg)
+		
+		
+Passes.register(1, "types", lambda program, graph: Types.specialize(program))
+Passes.register(2, "loops", lambda program, graph: Loops.find(program))
+
+
+class Program:
+	"""Class storing decoded program in columns (instruction with order N is at index N-1)"""
+	
+	# Kinds of arguments
+	kinds = {var: 0, label: 1, int: 2, str: 3, bool: 4}
+	typeKind = 5	# Argument <type> is str too
+	
+	
+	def __init__(self):
+		"""Creates empty program"""
+		
+		self.opCodes = array.array("B")	# Index of opCode in Instruction.opCodes for every instruction
+		self.argStarts = array.array("I", [0])	# Arguments of instruction N are at argStarts[N]:argStarts[N+1]
+		self.argKinds = array.array("B")	# Kind of every argument
+		self.argValues = array.array("I")	# Index of every argument in pool
+		self.checked = bytearray()	# Set to 1 when arguments of instruction passed the type check
+		self.pool = []	# Values and var/label objects shared by all instructions
+		self.poolIndex = {}	# Index of value in pool by its kind and value
+		self.entry = 0	# Index of the first instruction of main program (linked libraries are before it)
+		self.labels = []	# Name and order of every label of linked libraries (@see Library)
+		
+		
+	def __len__(self):
+		"""Returns count of instructions"""
+		
+		return len(self.opCodes)
+		
+		
+	def add(self, opCode, args):
+		"""Appends instruction to the end of the program"""
+		
+		# --- Save opCode ---
+		code = Instruction.opCodes.get(opCode)
+		if code == None:
+			Error.exit(Error.syntax, "Unknown instruction code")
+			
+		self.opCodes.append(code)
+		self.checked.append(0)
+		
+		# --- Save arguments ---
+		for position, arg in enumerate(args):
+			kind = self.kinds[type(arg)]
+			if kind == self.kinds[str] and position == 1 and opCode == "READ":
+				kind = self.typeKind
+				
+			# -- Find value in pool (var and label are compared by name) --
+			key = (kind, arg.name) if kind <= 1 else (kind, arg)
+			index = self.poolIndex.get(key)
+			if index == None:
+				index = len(self.pool)
+				self.pool.append(arg)
+				self.poolIndex[key] = index
+				
+			self.argKinds.append(kind)
+			self.argValues.append(index)
+			
+		self.argStarts.append(len(self.argValues))
+		
+		
+	def extend(self, unit):
+		"""Appends instructions and labels of another program to the end of the program"""
+		
+		shift = lambda values, offset: values if offset == 0 else array.array("I", [value+offset for value in values])
+		
+		self.labels.extend((name, order+len(self)) for name, order in unit.labels)
+		self.argStarts.extend(shift(unit.argStarts[1:], len(self.argValues)))
+		self.argValues.extend(shift(unit.argValues, len(self.pool)))
+		self.opCodes.extend(unit.opCodes)
+		self.argKinds.extend(unit.argKinds)
+		self.checked.extend(unit.checked)
+		self.pool.extend(unit.pool)
+		
+		
+	def indexes(self, opCodes):
+		"""Returns list of indexes of instructions with one of given opCodes"""
+		
+		return self.codeIndexes(code for code, name in enumerate(Instruction.opCodeNames) if name in opCodes)
+		
+		
+	def codeIndexes(self, codes):
+		"""Returns list of indexes of instructions with one of given codes"""
+		
+		result = []
+		opCodes = self.opCodes.tobytes()
+		for code in codes:	# Searching bytes is much faster than iterating over instructions
+			code = bytes((code,))
+			index = opCodes.find(code)
+			while index != -1:
+				result.append(index)
+				index = opCodes.find(code, index+1)
+				
+		result.sort()
+		return result
+		
+		
+	def getOpCode(self, index):
+		"""Returns opCode of the instruction"""
+		
+		return Instruction.opCodeNames[self.opCodes[index]]
+		
+		
+	def getArgKinds(self, index):
+		"""Returns list of argument kinds of the instruction"""
+		
+		return list(self.argKinds[self.argStarts[index]:self.argStarts[index+1]])
+		
+		
+	def getArgs(self, index):
+		"""Returns list of arguments of the instruction"""
+		
+		pool = self.pool
+		return [pool[i] for i in self.argValues[self.argStarts[index]:self.argStarts[index+1]]]
+		
+		
+	def specialize(self, index, code):
+		"""Changes code of the instruction to the code of its variant without type checks"""
+		
+		self.opCodes[index] = code
+		
+		
+	def fetch(self, index, instruction):
+		"""Loads the instruction to given Instruction object"""
+		
+		start = self.argStarts[index]
+		end = self.argStarts[index+1]
+		
+		instruction.code = self.opCodes[index]
+		instruction.opCode = Instruction.opCodeNames[instruction.code]
+		instruction.args = list(map(self.pool.__getitem__, self.argValues[start:end]))
+		instruction.argCount = end-start
+		instruction.index = index
+		instruction.checked = self.checked[index]
+		
+		
+	def toColumns(self):
+		"""Returns columns of the program in the form which is cheap to send between processes or save
+		Objects var and label are replaced by their names
+		"""
+		
+		poolKinds = bytearray(len(self.pool))
+		for kind, index in zip(self.argKinds, self.argValues):
+			poolKinds[index] = kind
+			
+		pool = [arg.name if kind <= 1 else arg for kind, arg in zip(poolKinds, self.pool)]
+		return self.opCodes, self.argStarts, self.argKinds, self.argValues, bytes(poolKinds), pool
+		
+		
+	@classmethod
+	def fromColumns(cls, columns):
+		"""Returns program made of columns created by toColumns()"""
+		
+		program = cls()
+		program.opCodes, program.argStarts, program.argKinds, program.argValues, poolKinds, pool = columns
+		program.checked = bytearray(len(program.opCodes))
+		
+		classes = (var, label)
+		program.pool = [classes[kind](value) if kind <= 1 else value for kind, value in zip(poolKinds, pool)]
+		return program
+		
+		
+class Library:
+	"""Class used to save decoded program as precompiled library and to link libraries with main program"""
+	
+	header = "IPPcode18 library"
+	
+	
+	@classmethod
+	def save(cls, program, path):
+		"""Saves decoded program with orders of its labels to the file"""
+		
+		# --- Find labels ---
+		names = set()
+		for index in program.indexes(("LABEL",)):
+			args = program.getArgs(index)	# Checked like Interpret.__findLabels() does it for main program
+			if len(args) != 1:
+				Error.exit(Error.semantic, "Invalid argument count")
+			if type(args[0]) != label:
+				Error.exit(Error.operands, "Invalid argument type (expected {0} given {1})".format(label, type(args[0])))
+				
+			name = str(args[0])
+			if name in names:
+				Error.exit(Error.semantic, "Label '{0}' already exists".format(name))
+			names.add(name)
+			program.labels.append((name, index+1))
+			
+		# --- Write file (plain data, loading it can't run any code) ---
+		content = {
+			"format": cls.header,
+			"interpret": Interpret.interpretHash(),	# Columns depend on the interpret version
+			"columns": [list(column) for column in program.toColumns()],
+			"labels": program.labels
+		}
+		
+		try:
+			with open(path, "w") as file:
+				json.dump(content, file)
+		except OSError:
+			Error.exit(Error.output, "Couldn't write library file")
+			
+			
+	@classmethod
+	def load(cls, path):
+		"""Returns decoded program of the library"""
+		
+		try:
+			with open(path, "rb") as file:
+				content = json.load(file)
+		except OSError:
+			Error.exit(Error.file, "Opening library file error")
+		except ValueError:	# Not JSON or not UTF-8
+			Error.exit(Error.structure, "Invalid library file")
+			
+		# --- Check version ---
+		if type(content) != dict or content.get("format") != cls.header or content.get("interpret") != Interpret.interpretHash():
+			Error.exit(Error.structure, "Invalid library file or library of different interpret version")
+			
+		# --- Create program ---
+		program = cls.__loadProgram(content)
+		if program == None:
+			Error.exit(Error.structure, "Invalid library file")
+			
+		return program
+		
+		
+	@staticmethod
+	def __loadProgram(content):
+		"""Returns program made of saved columns and labels or None when they aren't consistent"""
+		
+		kindTypes = {Program.kinds[var]: str, Program.kinds[label]: str, Program.kinds[int]: int,
+			Program.kinds[str]: str, Program.kinds[bool]: bool, Program.typeKind: str}
+			
+		try:
+			opCodes, argStarts, argKinds, argValues, poolKinds, pool = content["columns"]
+			columns = (array.array("B", opCodes), array.array("I", argStarts), array.array("B", argKinds),
+				array.array("I", argValues), bytes(poolKinds), list(pool))
+			labels = [(name, order) for name, order in content["labels"]]
+		except (KeyError, TypeError, ValueError, OverflowError):
+			return None
+			
+		# --- Check consistency of columns ---
+		count = len(opCodes)
+		if (len(argStarts) != count+1 or argStarts[0] != 0 or argStarts[-1] != len(argValues)
+				or any(argStarts[i] > argStarts[i+1] for i in range(count)) or len(argKinds) != len(argValues)
+				or len(poolKinds) != len(pool) or any(code >= len(Instruction.opCodeNames) for code in opCodes)):
+			return None
+			
+		if any(value >= len(pool) or poolKinds[value] != kind for kind, value in zip(argKinds, argValues)):
+			return None
+			
+		if any(type(value) != kindTypes.get(kind) for kind, value in zip(poolKinds, pool)):
+			return None
+			
+		if any(type(name) != str or type(order) != int or not 1 <= order <= count for name, order in labels):
+			return None
+			
+		program = Program.fromColumns(columns)
+		program.labels = labels
+		return program
+		
+		
+	@staticmethod
+	def link(libraries, main):
+		"""Returns program made of libraries followed by main program, orders are renumbered
+		Execution starts at the first instruction of main program and ends at its end
+		"""
+		
+		program = Program()
+		for unit in libraries + [main]:	# Labels of main program are found by Interpret
+			program.extend(unit)
+			
+		program.entry = len(program)-len(main)
+		return program
+		
+		
+class ParallelDecoder:
+	"""Class used to decode instruction nodes of big XML program in more processes
+	Program is split by bytes to chunks starting with <instruction node, every process parses
+	its chunk as one document and sends back columns of decoded instructions (@see Program.toColumns)
+	"""
+	
+	chunkSize = 10000	# Minimal count of instructions decoded by one process
+	nodeStart = b"<instruction "
+	data = None	# XML program read by worker processes (they are forked after it's set)
+	
+	
+	@classmethod
+	def loadXml(cls, data, jobs):
+		"""Decodes XML program in chunks by pool of processes and merges them
+		Errors are reported for the first wrong instruction like by serial decoding
+		Returns None when XML isn't in the form written by parse.php, isn't well-formed
+		or is too small to be split (it's decoded serially then)
+		"""
+		
+		# --- Find instruction nodes between header and footer ---
+		header = Interpret.matchHeader(data)
+		footer = data.rfind(b"</program>")
+		if header == None or footer == -1 or Interpret.xmlFooter.fullmatch(data, footer) == None:
+			return None
+			
+		count = min(jobs, data.count(cls.nodeStart, header.end(), footer)//cls.chunkSize)
+		if count < 2:
+			return None
+			
+		# --- Split to chunks of the same size in bytes ---
+		bounds = [header.end()]
+		for number in range(1, count):
+			bound = data.find(cls.nodeStart, header.end() + number*(footer-header.end())//count, footer)
+			if bound != -1 and bound > bounds[-1]:
+				bounds.append(bound)
+		bounds.append(footer)
+		
+		chunks = []	# Start, end and order of the first instruction of every chunk
+		order = 1
+		for start, end in zip(bounds, bounds[1:]):
+			chunks.append((start, end, order))
+			order = order + data.count(cls.nodeStart, start, end)
+			
+		# --- Decode chunks ---
+		try:
+			context = multiprocessing.get_context("fork")	# Other methods would run main() again in every process
+		except ValueError:
+			return None
+			
+		cls.data = data
+		try:
+			with context.Pool(len(chunks), initializer=cls.__initWorker) as pool:
+				results = pool.map(cls.decodeChunk, chunks)
+		finally:
+			cls.data = None
+			
+		if None in results:
+			return None	# ElementTree reports the error for whole file
+			
+		# --- Report the first error ---
+		for columns, error in results:
+			if error != None:
+				Error.exit(error[0], error[1])
+				
+		# --- Merge chunks ---
+		program = Program()
+		for columns, error in results:
+			program.extend(Program.fromColumns(columns))
+			
+		return program
+		
+		
+	@classmethod
+	def decodeChunk(cls, chunk):
+		"""Decodes instruction nodes between given positions of the program expected to start with given order
+		Returns columns of decoded instructions and code and message of the first error
+		or None when chunk isn't well-formed or doesn't consist of instruction nodes
+		"""
+		
+		start, end, order = chunk
+		
+		# --- Parse whole chunk first like ElementTree does with whole file ---
+		try:
+			root = ET.fromstring(b"<program>" + cls.data[start:end] + b"</program>")
+		except ET.ParseError:
+			return None
+			
+		if len(root) != cls.data.count(cls.nodeStart, start, end):
+			return None	# Parent counted orders by other nodes than those parsed
+			
+		# --- Decode nodes until the first error (order is checked like by serial decoding) ---
+		program = Program()
+		for index, node in enumerate(root):
+			try:
+				opCode, args = Instruction.loadNode(node, order+index)
+				program.add(opCode, args)
+			except Error.Deferred as error:
+				return program.toColumns(), (error.code, error.msg)
+				
+		return program.toColumns(), None
+		
+		
+	@staticmethod
+	def __initWorker():
+		"""Prepares worker process"""
+		
+		Error.deferred = True
+		
+		
+class DecodeCache:
+	"""Class used to reuse decoded instructions between versions of the program
+	Instructions are addressed by their content (XML node without order or words of source line),
+	so only changed instructions are parsed and decoded again. Labels are bound after every load anyway.
+	"""
+	
+	path = None	# File with decoded instructions (None when disabled)
+	entries = {}	# OpCode and arguments by content of instruction
+	used = {}	# Entries of currently loaded program
+	
+	
+	@classmethod
+	def enable(cls, path):
+		"""Loads decoded instructions from the file (missing or outdated file means empty cache)"""
+		
+		cls.path = path
+		cls.used = {}
+		
+		try:
+			with open(path, "rb") as file:
+				content = pickle.load(file)
+		except Exception:	# Missing file or file which can't be unpickled
+			return
+			
+		# --- Decoding could be changed by different interpret version ---
+		if type(content) == tuple and len(content) == 2 and content[0] == Interpret.interpretHash():
+			cls.entries = content[1]
+			
+			
+	@classmethod
+	def decode(cls, key, decoder):
+		"""Returns opCode and arguments of instruction with given content, decoder is called only for new content"""
+		
+		entry = cls.entries.get(key)
+		if entry == None:
+			entry = decoder()	# Ends on error so invalid instructions are never saved
+			
+		cls.used[key] = entry
+		return entry
+		
+		
+	@classmethod
+	def loadXml(cls, data):
+		"""Decodes XML program, only instruction nodes with new content are parsed
+		Returns None when XML isn't in the form written by parse.php
+		"""
+		
+		# --- Split to instruction nodes ---
+		nodes = Interpret.splitXml(data)
+		if nodes == None:
+			return None
+			
+		# --- Parse new nodes (whole file must be well-formed before decoding like with ElementTree) ---
+		parsed = {}
+		for order, content in nodes:
+			if content not in cls.entries and content not in parsed:
+				try:
+					parsed[content] = ET.fromstring(b"<instruction" + content)
+				except ET.ParseError:
+					return None
+					
+		# --- Decode nodes in order ---
+		program = Program()
+		for order, content in nodes:
+			if int(order) != len(program)+1:	# Compared as numbers like by Instruction.loadNode
+				Error.exit(Error.structure, "Wrong instruction order")
+				
+			opCode, args = cls.decode(content, lambda: Instruction.decodeNode(parsed[content]))
+			program.add(opCode, args)
+			
+		return program
+		
+		
+	@classmethod
+	def save(cls):
+		"""Keeps only entries of loaded program and writes them to the file when they changed"""
+		
+		changed = cls.used.keys() != cls.entries.keys()
+		cls.entries = cls.used
+		cls.used = {}
+		
+		if not changed:
+			return
+			
+		try:
+			with open(cls.path+".tmp", "wb") as file:
+				pickle.dump((Interpret.interpretHash(), cls.entries), file, pickle.HIGHEST_PROTOCOL)
+			os.replace(cls.path+".tmp", cls.path)
+		except OSError:
+			Error.exit(Error.output, "Couldn't write decode cache file")
+			
+			
+class Interpret():
+	"""Main class of this program. It represents the interpret itself"""
+	
+	# XML in the form written by parse.php (@see splitXml)
+	xmlHeader = re.compile(rb'<\?xml version="1\.0" encoding="UTF-8"\?>[ \t\r\n]*<program(?: (?!xmlns)[a-zA-Z]+="[^"<&]*")*>')
+	xmlInstruction = re.compile(rb'[ \t\r\n]*<instruction order="([0-9]+)"( opcode="[^"<&]*"(?:/>|>.*?</instruction>))', re.DOTALL)
+	xmlFooter = re.compile(rb'[ \t\r\n]*</program>[ \t\r\n]*')
+	
+	instrOrder = 1	# Defines order number of instruction which is currently loaded
+	valStack = Stack()	# Used by POPS and PUSHS
+	callStack = Stack()	# Used by CALL and RETURN
+	inputLines = 0	# Count of lines read by READ
+	hooks = []	# Functions called before every instruction (empty list means faster loop without them)
+	program = None	# Decoded instructions (instruction with order N is at index N-1)
+	
+	@staticmethod		
+	def checkRoot(root):
+		"""Checks if root node is valid"""
+		
+		if root.tag != "program":
+			Error.exit(Error.structure, "Root node <program> not found")
 			
 		if "language" in root.attrib:
 			if root.attrib["language"].lower() != "ippcode18":
@@ -372,44 +2065,245 @@ class Interpret():
 			Error.exit(Error.structure, "Invalid <program> attributes")
 	
 	
-	@classmethod		
-	def loadInstructions(cls, root):
-		"""Loads all instruction nodes in source file and executes them"""
+	@classmethod
+	def loadProgram(cls, path):
+		"""Loads program from XML or IPPcode18 source file (detected by its first character)
+		File can be compressed by gzip or xz (detected by its magic bytes)
+		Returns decoded program
+		"""
+		
+		# --- Open input file ---
+		try:
+			file = open(path, "rb")
+		except IOError:
+			Error.exit(Error.file, "Opening input file error")
+			
+		gc.disable()	# Decoding creates no reference cycles, collecting would only slow it down
+		with file:
+			# --- Decompress while reading ---
+			magic = file.peek(6)[:6]
+			if magic[:2] == b"\x1f\x8b":
+				stream = gzip.GzipFile(fileobj=file)
+			elif magic == b"\xfd7zXZ\x00":
+				stream = lzma.LZMAFile(file)
+			else:
+				stream = file
+				
+			try:
+				# --- Load XML ---
+				start = stream.peek(64)
+				if start[:3] == b"\xef\xbb\xbf":
+					start = start[3:]	# UTF-8 BOM is skipped by ElementTree
+					
+				if start.lstrip()[:1] == b"<":
+					# -- Reuse decoded instruction nodes --
+					if DecodeCache.path != None:
+						data = stream.read()
+						program = DecodeCache.loadXml(data)
+						if program != None:
+							return program
+						stream = io.BytesIO(data)	# Unusual form of XML is loaded as a whole
+						
+					# -- Decode in more processes --
+					elif Options.jobs > 1:
+						data = stream.read()
+						program = ParallelDecoder.loadXml(data, Options.jobs)
+						if program != None:
+							return program
+						stream = io.BytesIO(data)
+						
+					try:
+						tree = ET.ElementTree(file=stream)
+					except ET.ParseError:
+						Error.exit(Error.structure, "No element found in the file")
+						
+					return cls.loadInstructions(tree.getroot())
+					
+				# --- Load IPPcode18 source ---
+				return SourceParser.parse(io.TextIOWrapper(stream, encoding="utf-8"))
+				
+			# --- Reading errors ---
+			except (EOFError, lzma.LZMAError, zlib.error):
+				Error.exit(Error.structure, "Corrupted compressed input file")
+			except IOError:
+				if stream is not file:
+					Error.exit(Error.structure, "Corrupted compressed input file")
+				Error.exit(Error.file, "Reading input file error")
+			except UnicodeDecodeError:
+				Error.exit(Error.file, "Reading input file error")
+			finally:
+				gc.enable()
+				
+				
+	@staticmethod
+	def interpretHash():
+		"""Returns hash of this interpret (files saved by other version of it can't be used)"""
+		
+		with open(__file__, "rb") as file:
+			return hashlib.sha1(file.read()).hexdigest()
+			
+			
+	@classmethod
+	def matchHeader(cls, data):
+		"""Matches XML declaration and <program> node in the form written by parse.php
+		Returns the match or None when header has other form or isn't well-formed (e.g. duplicated attribute)
+		"""
+		
+		match = cls.xmlHeader.match(data)
+		if match == None:
+			return None
+			
+		try:
+			ET.fromstring(match.group() + b"</program>")
+		except ET.ParseError:
+			return None	# ElementTree reports the error for whole file
+			
+		return match
+		
+		
+	@classmethod
+	def splitXml(cls, data):
+		"""Splits XML in the form written by parse.php to instruction nodes without parsing them
+		Returns list of order and content (rest of node after order attribute) of every node
+		or None for other forms of XML (they have to be parsed by ElementTree as a whole)
+		"""
+		
+		match = cls.matchHeader(data)
+		if match == None:
+			return None
+			
+		nodes = []
+		position = match.end()
+		match = cls.xmlInstruction.match(data, position)
+		while match != None:
+			nodes.append(match.groups())
+			position = match.end()
+			match = cls.xmlInstruction.match(data, position)
+			
+		if cls.xmlFooter.fullmatch(data, position) == None:
+			return None
+			
+		return nodes
+		
+		
+	@staticmethod
+	def loadInstructions(root):
+		"""Decodes all instruction nodes in XML source file
+		Returns list of decoded instructions
+		"""
 		
 		# --- Search all nodes ---
 		instrNodes = root.findall("./")
-		instrNodesCount = len(instrNodes)
 		
-		# --- Search for LABEL nodes ---
-		cls.__findLabels(instrNodes)
-		cls.instrOrder = 1	# Reset instruction counter
+		# --- Decode every node ---
+		program = Program()
+		for node in instrNodes:
+			opCode, args = Instruction.loadNode(node, len(program)+1)
+			program.add(opCode, args)
+			
+		return program
+		
+		
+	@classmethod
+	def run(cls, program):
+		"""Executes decoded program"""
+		
+		cls.program = program
+		
+		# --- Prepare saving of final state ---
+		if Options.statePath != None:
+			atexit.register(Debugger.save, Options.statePath)
+			
+		# --- Run as the reference engine ---
+		if Options.reference:
+			Frames.reuse = False
+			Instruction.cacheChecks = False
+			
+		# --- Search for LABEL instructions ---
+		for name, order in program.labels:	# Labels of libraries are already known
+			Labels.add(name, order)
+		cls.__findLabels(program)
+		cls.instrOrder = program.entry+1	# Reset instruction counter
+		
+		# --- Optimize program ---
+		level = Options.optimize
+		if Options.breakpoints != None or Options.step:
+			level = min(level, 1)	# Debugger must stop inside loops, so they can't be computed at once (@see Loops)
+			
+		Passes.run(program, level)
+		
+		if Options.dumpIr == True:
+			Passes.dump(program, sys.stdout)
+			sys.exit(0)
+		
+		# --- Prepare saving and restoring of execution state ---
+		if Options.resumePath != None:
+			Checkpoint.restore(Options.resumePath)
+			
+		if Options.checkpointPath != None:
+			Checkpoint.enable(Options.checkpointPath, Options.checkpointEvery)
+			
+		# --- Prepare tracing ---
+		if Options.tracePath != None:
+			Trace.enable(Options.tracePath, Options.traceEvery, Options.traceOpCodes, Options.traceLabels)
+			
+		# --- Prepare profiling ---
+		if Options.profilePath != None:
+			Profiler.enable(Options.profilePath, Options.profileInterval)
+			
+		# --- Prepare debugger ---
+		if Options.breakpoints != None or Options.step:
+			Debugger.enable(Options.breakpoints or set(), Options.step, Options.debugInputPath)
+			
+		# --- Cycle throught every instruction ---
+		if len(cls.hooks) == 0:
+			cls.__run(program)
+		else:
+			cls.__runWithHooks(program)
 			
-		# --- Cycle throught every node ---
-		while cls.instrOrder <= instrNodesCount:	# Watchout! instrOrder starts at 1
-			# -- Get current node --
-			node = instrNodes[cls.instrOrder-1]
 			
-			# -- Skip LABEL nodes --
-			if node.attrib["opcode"].upper() == "LABEL":
-				cls.instrOrder = cls.instrOrder+1
-				continue	# They are already loaded by __findLabels()
+	@classmethod
+	def __run(cls, program):
+		"""Executes instructions starting at instrOrder"""
+		
+		instrCount = len(program)
+		instruction = Instruction(None, [])	# Every instruction is loaded to this object before execution
+		fetch = program.fetch
 			
-			# -- Processing instruction --
-			instruction = Instruction(node)
+		while cls.instrOrder <= instrCount:	# Watchout! instrOrder starts at 1
+			fetch(cls.instrOrder-1, instruction)
 			instruction.execute()
+			cls.instrOrder = cls.instrOrder+1
+			
+			
+	@classmethod
+	def __runWithHooks(cls, program):
+		"""Executes instructions starting at instrOrder and calls hooks before every one of them"""
+		
+		instrCount = len(program)
+		instruction = Instruction(None, [])
+			
+		while cls.instrOrder <= instrCount:
+			program.fetch(cls.instrOrder-1, instruction)
 			
-			# -- Add counter --
+			# -- Call hooks --
+			for hook in cls.hooks:
+				hook(instruction)
+				
+			instruction.execute()
 			cls.instrOrder = cls.instrOrder+1
 	
 	
 	@classmethod	
-	def __findLabels(cls, instrNodes):
+	def __findLabels(cls, program):
 		"""Search every LABEL instruction used and saves it"""
-		for node in instrNodes:
-			if node.attrib["opcode"].upper() == "LABEL":
-				cls.instrOrder = int(node.attrib["order"])	# This is read from Labels.add
-				instruction = Instruction(node)
-				instruction.execute()
+		
+		instruction = Instruction(None, [])
+		indexes = program.indexes(("LABEL",))
+		for index in indexes[bisect.bisect_left(indexes, program.entry):]:	# Only main program
+			cls.instrOrder = index+1	# This is read from Labels.add
+			program.fetch(index, instruction)
+			instruction.loadLabel()
 				
 		
 	@staticmethod	
@@ -422,7 +2316,7 @@ class Interpret():
 		# --- Variable type ---
 		if xmlType == "var":
 			if not re.search(r"^(LF|TF|GF)@[\w_\-$&%*][\w\d_\-$&%*]*$", xmlValue):
-				Error.Exit(Error.syntax, "Invalid var name")
+				Error.exit(Error.syntax, "Invalid var name")
 				
 			return var(xmlValue)
 		
@@ -430,7 +2324,7 @@ class Interpret():
 		elif xmlType == "int":
 			if not re.search(r"^[-+]?\d+$$", xmlValue):
 				if die == True:
-					Error.Exit(Error.syntax, "Invalid int value")
+					Error.exit(Error.syntax, "Invalid int value")
 				else:
 					return 0
 			
@@ -444,7 +2338,7 @@ class Interpret():
 			
 			if re.search(r"(?!\\[0-9]{3})[\s\\#]", xmlValue):	# @see parse.php for regex legend
 				if die == True:
-					Error.Exit(Error.syntax, "Illegal characters in string")
+					Error.exit(Error.syntax, "Illegal characters in string")
 				else:
 					return ""
 			
@@ -470,7 +2364,7 @@ class Interpret():
 				boolean = False
 			else:
 				if die == True:
-					Error.Exit(Error.syntax, "Invalid bool value (given {0})".format(xmlValue))
+					Error.exit(Error.syntax, "Invalid bool value (given {0})".format(xmlValue))
 				else:
 					return False
 			
@@ -479,44 +2373,225 @@ class Interpret():
 		# --- Type type ---
 		if xmlType == "type":
 			if not re.search(r"^(int|string|bool)$", xmlValue):
-				Error.Exit(Error.syntax, "Invalid type value")
+				Error.exit(Error.syntax, "Invalid type value")
 				
 			return xmlValue
 			
 		# --- Type label ---
 		if xmlType == "label":
 			if not re.search(r"^[\w_\-$&%*][\w\d_\-$&%*]*$", xmlValue):
-				Error.Exit(Error.syntax, "Invalid label name")
+				Error.exit(Error.syntax, "Invalid label name")
 				
 			return label(xmlValue)	
 			
 		# --- Invalid type ---
 		else:
-			Error.Exit(Error.syntax, "Unknown argument type (given {0})".format(xmlType))
+			Error.exit(Error.syntax, "Unknown argument type (given {0})".format(xmlType))
+	
+	
+	
+class SourceParser:
+	"""Class used to load program directly from IPPcode18 source code (same rules as parse.php)"""
+	
+	# Arguments of every instruction ("var", "symb", "label" or "type")
+	argumentTypes = {
+		"MOVE": ("var", "symb"), "NOT": ("var", "symb"), "INT2CHAR": ("var", "symb"),
+		"STRLEN": ("var", "symb"), "TYPE": ("var", "symb"),
+		"CREATEFRAME": (), "PUSHFRAME": (), "POPFRAME": (), "RETURN": (), "BREAK": (),
+		"DEFVAR": ("var",), "POPS": ("var",),
+		"CALL": ("label",), "LABEL": ("label",), "JUMP": ("label",),
+		"JUMPIFEQ": ("label", "symb", "symb"), "JUMPIFNEQ": ("label", "symb", "symb"),
+		"PUSHS": ("symb",), "WRITE": ("symb",), "DPRINT": ("symb",),
+		"ADD": ("var", "symb", "symb"), "SUB": ("var", "symb", "symb"), "MUL": ("var", "symb", "symb"),
+		"IDIV": ("var", "symb", "symb"), "LT": ("var", "symb", "symb"), "GT": ("var", "symb", "symb"),
+		"EQ": ("var", "symb", "symb"), "AND": ("var", "symb", "symb"), "OR": ("var", "symb", "symb"),
+		"STRI2INT": ("var", "symb", "symb"), "CONCAT": ("var", "symb", "symb"),
+		"GETCHAR": ("var", "symb", "symb"), "SETCHAR": ("var", "symb", "symb"),
+		"READ": ("var", "type"),
+		# STACK extension
+		"CLEARS": (), "ADDS": (), "SUBS": (), "MULS": (), "IDIVS": (), "LTS": (), "GTS": (), "EQS": (),
+		"ANDS": (), "ORS": (), "NOTS": (), "INT2CHARS": (), "STRI2INTS": (),
+		"JUMPIFEQS": ("label",), "JUMPIFNEQS": ("label",)
+	}
 	
+	# Regexes @see parse.php
+	identifier = re.compile(r"^[a-zA-Z_\-$&%*][a-zA-Z0-9_\-$&%*]*$")
+	integer = re.compile(r"^[-+]?\d+$")
+	illegalString = re.compile(r"(?!\\[0-9]{3})[\s\\#]")
 	
 	
+	@classmethod
+	def parse(cls, file):
+		"""Loads every line of the source code
+		Returns list of decoded instructions
+		"""
+		
+		# --- Check header ---
+		header = file.readline()
+		if header == "":
+			Error.exit(Error.file, "No input")
+			
+		if cls.__removeComment(header).strip().lower() != ".ippcode18":
+			Error.exit(Error.source, "Invalid header")
+			
+		# --- Load instructions ---
+		program = Program()
+		for line in file:
+			words = cls.__removeComment(line).split()
+			
+			# -- Skip empty lines and commentary --
+			if len(words) == 0:
+				continue
+				
+			# -- Reuse line with the same words --
+			if DecodeCache.path != None:
+				opCode, args = DecodeCache.decode(("src",)+tuple(words), lambda: cls.__loadInstruction(words, len(program)+1))
+			else:
+				opCode, args = cls.__loadInstruction(words, len(program)+1)
+				
+			program.add(opCode, args)
+			
+		return program
+		
+		
+	@staticmethod
+	def __removeComment(line):
+		"""Returns line without commentary"""
+		
+		position = line.find("#")
+		if position != -1:
+			return line[:position]
+			
+		return line
+		
+		
+	@classmethod
+	def __loadInstruction(cls, words, order):
+		"""Decodes instruction from words of its line
+		Returns its opCode and list of arguments
+		"""
+		
+		opCode = words[0].upper()
+		
+		# --- Check instruction ---
+		if opCode not in cls.argumentTypes:
+			Error.exit(Error.source, "Invalid instruction (#{0}: \"{1}\")".format(order, words[0]))
+			
+		argumentTypes = cls.argumentTypes[opCode]
+		if len(argumentTypes) != len(words)-1:
+			Error.exit(Error.source, "Too many or too few arguments for instruction (#{0}: \"{1}\")".format(order, words[0]))
+			
+		# --- Decode arguments ---
+		args = []
+		for argumentType, word in zip(argumentTypes, words[1:]):
+			xmlType, xmlValue = cls.__checkArgument(argumentType, word, order)
+			args.append(Interpret.convertValue(xmlType, xmlValue, True))
+			
+		return opCode, args
+		
+		
+	@classmethod
+	def __checkArgument(cls, argumentType, word, order):
+		"""Checks lexical rules of the argument
+		Returns its type and value in the same form as in XML
+		"""
+		
+		# --- Type <label> ---
+		if argumentType == "label":
+			if not cls.identifier.search(word):
+				Error.exit(Error.source, "Invalid argument (type=\"label\" in instruction #{0})".format(order))
+			return "label", word
+			
+		# --- Type <type> ---
+		if argumentType == "type":
+			if word not in ("int", "string", "bool"):
+				Error.exit(Error.source, "Invalid argument (type=\"type\" in instruction #{0})".format(order))
+			return "type", word
+			
+		# --- Types <var> and <symb> ---
+		prefix, separator, value = word.partition("@")
+		if separator == "":
+			Error.exit(Error.source, "There must be a '@' character in argument (instruction #{0})".format(order))
+			
+		if prefix in ("GF", "LF", "TF"):
+			if not cls.identifier.search(value):
+				Error.exit(Error.source, "Invalid characters in var (instruction #{0})".format(order))
+			return "var", word
+			
+		if argumentType == "var":
+			Error.exit(Error.source, "Invalid argument (type=\"var\" in instruction #{0})".format(order))
+			
+		if prefix == "int":
+			if not cls.integer.search(value):
+				Error.exit(Error.source, "Invalid characters in int constant (instruction #{0})".format(order))
+				
+		elif prefix == "bool":
+			if value != "true" and value != "false":
+				Error.exit(Error.source, "Invalid characters in bool constant (instruction #{0})".format(order))
+				
+		elif prefix == "string":
+			if cls.illegalString.search(value):
+				Error.exit(Error.source, "Invalid characters in string (instruction #{0})".format(order))
+				
+		else:
+			Error.exit(Error.source, "Invalid constant type (instruction #{0})".format(order))
+			
+		return prefix, value
+		
+		
 class Instruction():
 	"""Class representing one IPPcode18 instruction"""
 	
-	def __init__(self, node):
-		"""Initialization of internal strcture of XML <instruction> node"""
+	cacheChecks = True	# Successful check of arguments is remembered (disabled for reference run)
+	
+	def __init__(self, opCode, args):
+		"""Initialization of decoded instruction"""
+		
+		self.opCode = opCode
+		self.args = args
+		self.argCount = len(args)
+		self.code = None	# Code of the method executing instruction (@see Instruction.codeHandlers)
+		self.index = None	# Index in Interpret.program
+		self.checked = False	# Set when arguments were already checked by previous execution
+		
+		
+	@classmethod
+	def loadNode(cls, node, order):
+		"""Decodes XML <instruction> node expected to have given order
+		Returns its opCode and list of arguments
+		"""
 		
 		# --- Check node ---
 		if node.tag != "instruction":
 			Error.exit(Error.structure, "Wrong node loaded (Expected instruction)")
+			
+		if "order" not in node.attrib or "opcode" not in node.attrib:
+			Error.exit(Error.structure, "Missing instruction attribute")
 		
-		# --- Order check ---
-		if int(node.attrib["order"]) != Interpret.instrOrder:
+		# --- Order check (compared as numbers, e.g. "01" is 1) ---
+		try:
+			wrongOrder = int(node.attrib["order"]) != order
+		except ValueError:
+			wrongOrder = True
+			
+		if wrongOrder:
 			Error.exit(Error.structure, "Wrong instruction order")
 		
 		# --- Process node ---
-		self.opCode = node.attrib["opcode"].upper()	
-		self.args = self.__loadArguments(node)
-		self.argCount = len(self.args)
+		return cls.decodeNode(node)
+		
+		
+	@classmethod
+	def decodeNode(cls, node):
+		"""Decodes XML <instruction> node without checking its order
+		Returns its opCode and list of arguments
+		"""
+		
+		return node.attrib["opcode"].upper(), cls.__loadArguments(node)
 		
 		
-	def __loadArguments(self, instrNode):	
+	@staticmethod
+	def __loadArguments(instrNode):	
 		"""Loads child nodes (<argX>) of <instruction> node"""
 		
 		# --- Create list for arguments ---
@@ -524,19 +2599,22 @@ class Instruction():
 		
 		# --- Load child nodes ---	
 		for argNode in instrNode:
-			if argNode.tag[:3] != "arg":
+			if argNode.tag[:3] != "arg" or not argNode.tag[3:].isdigit():
 				Error.exit(Error.structure, "Wrong node loaded (expected arg node given)")
 
 			# -- Get arg index --
 			argIndex = int(argNode.tag[3:])-1
 			
-			if argIndex > len(args):
+			if argIndex < 0 or argIndex >= len(args):
 				Error.exit(Error.structure, "Argument node out of range")
 			
 			if args[argIndex] != None:
 				Error.exit(Error.structure, "Duplicated argument node")
 		
 			# --- Save arg value ---
+			if "type" not in argNode.attrib:
+				Error.exit(Error.structure, "Missing argument type")
+				
 			args[argIndex] = Interpret.convertValue(argNode.attrib["type"], argNode.text, True)
 		
 		# --- Check if loaded all expected arguments ---	
@@ -550,6 +2628,10 @@ class Instruction():
 	
 	def __checkArguments(self, *expectedArgs):	
 		"""Checks if arguments have expected type"""
+		
+		# --- Arguments don't change so they are checked only once ---
+		if self.checked:
+			return
 			
 		# --- Checking arguments count ---
 		if self.argCount != len(expectedArgs):
@@ -583,77 +2665,32 @@ class Instruction():
 				Error.exit(Error.internal, "Illegal usage of Instruction.checkArguments()")
 				
 			i = i+1
+			
+		# --- Remember successful check ---
+		if self.cacheChecks:
+			Interpret.program.checked[self.index] = 1
 		
 	
+	@staticmethod
+	def __checkPosition(string, position, opCodes):
+		"""Checks if position is index of character in the string (same for every string instruction)"""
+		
+		if position < 0 or position >= len(string):
+			Error.exit(Error.string, "{0} position out of range".format(opCodes))
+			
+			
 	def execute(self):
-		"""Executes instruction depending on opCode"""
-		
-		if self.opCode == "DEFVAR":
-			self.__DEFVAR()
-		elif self.opCode == "ADD":
-			self.__ADD()
-		elif self.opCode == "SUB":
-			self.__SUB()
-		elif self.opCode == "MUL":
-			self.__MUL()
-		elif self.opCode == "IDIV":
-			self.__IDIV()
-		elif self.opCode == "WRITE":
-			self.__WRITE()
-		elif self.opCode == "MOVE":
-			self.__MOVE()
-		elif self.opCode == "PUSHS":
-			self.__PUSHS()
-		elif self.opCode == "POPS":
-			self.__POPS()
-		elif self.opCode == "STRLEN":
-			self.__STRLEN()
-		elif self.opCode == "CONCAT":
-			self.__CONCAT()
-		elif self.opCode == "GETCHAR":
-			self.__GETCHAR()
-		elif self.opCode == "SETCHAR":
-			self.__SETCHAR()
-		elif self.opCode == "TYPE":
-			self.__TYPE()
-		elif self.opCode == "AND":
-			self.__AND()
-		elif self.opCode == "OR":
-			self.__OR()
-		elif self.opCode == "NOT":
-			self.__NOT()
-		elif self.opCode == "LT" or self.opCode == "EQ" or self.opCode == "GT":
-			self.__LT_EQ_GT(self.opCode)
-		elif self.opCode == "INT2CHAR":
-			self.__INT2CHAR()
-		elif self.opCode == "STRI2INT":
-			self.__STRI2INT()
-		elif self.opCode == "READ":
-			self.__READ()
-		elif self.opCode == "LABEL":	# Called from Interpret.__findLabels()
-			self.__LABEL()	
-		elif self.opCode == "JUMP":
-			self.__JUMP()
-		elif self.opCode == "JUMPIFEQ":
-			self.__JUMPIFEQ_JUMPIFNEQ(True)
-		elif self.opCode == "JUMPIFNEQ":
-			self.__JUMPIFEQ_JUMPIFNEQ(False)		
-		elif self.opCode == "DPRINT" or self.opCode == "BREAK":
-			pass
-		elif self.opCode == "CREATEFRAME":
-			self.__CREATEFRAME()
-		elif self.opCode == "PUSHFRAME":
-			self.__PUSHFRAME()
-		elif self.opCode == "POPFRAME":
-			self.__POPFRAME()
-		elif self.opCode == "CALL":
-			self.__CALL()
-		elif self.opCode == "RETURN":
-			self.__RETURN()
-		else:
-			Error.exit(Error.syntax, "Unknown instruction code")	
+		"""Executes instruction depending on its code"""
+		
+		self.codeHandlers[self.code](self)
 	
 	
+	def loadLabel(self):
+		"""Saves label of LABEL instruction, called from Interpret.__findLabels()"""
+		
+		self.__LABEL()
+		
+		
 	# === IPPcode18 methods ===
 		
 	# --- Instrcution DEFVAR ---
@@ -737,6 +2774,38 @@ class Instruction():
 		print(result)
 
 
+	# --- Instrcution DPRINT ---
+	def __DPRINT(self):
+		"""@see zadani.pdf"""
+		
+		self.__checkArguments(symb)
+		
+		# --- Get value stored in var ---
+		if type(self.args[0]) == var:
+			value = self.args[0].getValue()
+		else:
+			value = self.args[0]
+			
+		# --- Print result to STDERR ---
+		if type(value) == bool:
+			value = "true" if value else "false"
+			
+		print(value, file=sys.stderr)
+		
+		
+	# --- Instrcution BREAK ---
+	def __BREAK(self):
+		"""@see zadani.pdf"""
+		
+		self.__checkArguments()
+		
+		Debugger.dump(sys.stderr)
+		
+		# -- Attached debugger stops at the next instruction --
+		if Debugger.commands != None:
+			Debugger.stepping = True
+			
+			
 	# --- Instrcution MOVE ---
 	def __MOVE(self):
 		"""@see zadani.pdf"""
@@ -751,8 +2820,14 @@ class Instruction():
 		"""@see zadani.pdf"""
 		
 		self.__checkArguments(symb)
+		
+		# -- Get value inside var (stack must not change with the variable) --
+		if type(self.args[0]) == var:
+			value = self.args[0].getValue()
+		else:
+			value = self.args[0]
 	
-		Interpret.valStack.push(self.args[0])
+		Interpret.valStack.push(value)
 
 
 	# --- Instrcution POPS ---
@@ -797,8 +2872,7 @@ class Instruction():
 		string = str(self.args[1])
 		position = int(self.args[2])
 		
-		if position >= len(string):
-			Error.exit(Error.string, "GETCHAR/STRI2INT position out of range")
+		self.__checkPosition(string, position, "GETCHAR/STRI2INT")
 		
 		result = string[position]
 	
@@ -815,8 +2889,7 @@ class Instruction():
 		position = int(self.args[1])
 		character = str(self.args[2])
 		
-		if position >= len(string):
-			Error.exit(Error.string, "SETCHAR position out of range")
+		self.__checkPosition(string, position, "SETCHAR")
 		if len(character) == 0:
 			Error.exit(Error.string, "SETCHAR replacement character not given")
 		
@@ -954,6 +3027,7 @@ class Instruction():
 		self.__checkArguments(var, str)	# Should be <var> <type> but there is no class Type
 		
 		inputStr = input()
+		Interpret.inputLines = Interpret.inputLines+1
 		
 		# -- Bool input special rules --
 		inputStr = inputStr.lower()
@@ -1018,8 +3092,12 @@ class Instruction():
 		
 		self.__checkArguments()
 		
+		# -- Reuse old TF --
+		if Frames.temporaryFrame != None:
+			Frames.release(Frames.temporaryFrame)
+		
 		# -- Reset TF --
-		Frames.temporaryFrame = {}
+		Frames.temporaryFrame = Frames.create()
 		
 		
 	# --- Instrcution PUSHFRAME ---	
@@ -1052,11 +3130,18 @@ class Instruction():
 		if Frames.localFrame == None:
 			Error.exit(Error.scopeExistence, "Local frame not defined")
 			
+		# -- Reuse old TF --
+		if Frames.temporaryFrame != None:
+			Frames.release(Frames.temporaryFrame)
+			
 		# -- Set TF --
 		Frames.temporaryFrame = Frames.stack.pop()	# TF = previous top of the stack (LF)
 		
-		# -- Reset LF --
-		Frames.localFrame = None
+		# -- Set LF to the new top of the stack --
+		if len(Frames.stack) != 0:
+			Frames.localFrame = Frames.stack[-1]
+		else:
+			Frames.localFrame = None
 		
 		
 	# --- Instrcution CALL ---	
@@ -1074,7 +3159,312 @@ class Instruction():
 		
 		self.__checkArguments()
 			
-		Interpret.instrOrder = Interpret.callStack.pop()	
+		Interpret.instrOrder = Interpret.callStack.pop()
+		
+		
+	# === STACK extension methods ===
+	
+	# --- Operands of stack instructions ---
+	def __popOperands(self, count, expectedType):
+		"""Pops operands from the data stack (last operand is on top of the stack)
+		Every operand must have expected type, when expectedType is None they must have the same type
+		"""
+		
+		# -- Pop values --
+		values = [None] * count
+		for i in range(count-1, -1, -1):
+			values[i] = Interpret.valStack.pop()
+			
+		# -- Check types --
+		if expectedType == None:
+			expectedType = type(values[0])
+			
+		for value in values:
+			if type(value) != expectedType:
+				Error.exit(Error.operands, "Unexpected type of value on the stack")
+				
+		return values
+		
+		
+	# --- Instrcution CLEARS ---
+	def __CLEARS(self):
+		"""@see zadani.pdf"""
+		
+		self.__checkArguments()
+		
+		Interpret.valStack.content = []
+		
+		
+	# --- Instrcution ADDS ---
+	def __ADDS(self):
+		"""@see zadani.pdf"""
+		
+		self.__checkArguments()
+		
+		valueA, valueB = self.__popOperands(2, int)
+		Interpret.valStack.push(valueA + valueB)
+		
+		
+	# --- Instrcution SUBS ---
+	def __SUBS(self):
+		"""@see zadani.pdf"""
+		
+		self.__checkArguments()
+		
+		valueA, valueB = self.__popOperands(2, int)
+		Interpret.valStack.push(valueA - valueB)
+		
+		
+	# --- Instrcution MULS ---
+	def __MULS(self):
+		"""@see zadani.pdf"""
+		
+		self.__checkArguments()
+		
+		valueA, valueB = self.__popOperands(2, int)
+		Interpret.valStack.push(valueA * valueB)
+		
+		
+	# --- Instrcution IDIVS ---
+	def __IDIVS(self):
+		"""@see zadani.pdf"""
+		
+		self.__checkArguments()
+		
+		valueA, valueB = self.__popOperands(2, int)
+		
+		# -- Check for zero divide --
+		if valueB == 0:
+			Error.exit(Error.zeroDivide, "Tried to divide by zero")
+			
+		Interpret.valStack.push(valueA // valueB)
+		
+		
+	# --- Instrcution LTS/EQS/GTS ---
+	def __LTS_EQS_GTS(self, operation):
+		"""@see zadani.pdf"""
+		
+		self.__checkArguments()
+		
+		valueA, valueB = self.__popOperands(2, None)
+		
+		# -- Compare values --
+		if operation == "LTS":
+			result = valueA < valueB
+		elif operation == "EQS":
+			result = valueA == valueB
+		else:
+			result = valueA > valueB
+			
+		Interpret.valStack.push(result)
+		
+		
+	# --- Instrcution ANDS ---
+	def __ANDS(self):
+		"""@see zadani.pdf"""
+		
+		self.__checkArguments()
+		
+		valueA, valueB = self.__popOperands(2, bool)
+		Interpret.valStack.push(valueA and valueB)
+		
+		
+	# --- Instrcution ORS ---
+	def __ORS(self):
+		"""@see zadani.pdf"""
+		
+		self.__checkArguments()
+		
+		valueA, valueB = self.__popOperands(2, bool)
+		Interpret.valStack.push(valueA or valueB)
+		
+		
+	# --- Instrcution NOTS ---
+	def __NOTS(self):
+		"""@see zadani.pdf"""
+		
+		self.__checkArguments()
+		
+		value, = self.__popOperands(1, bool)
+		Interpret.valStack.push(not value)
+		
+		
+	# --- Instrcution INT2CHARS ---
+	def __INT2CHARS(self):
+		"""@see zadani.pdf"""
+		
+		self.__checkArguments()
+		
+		value, = self.__popOperands(1, int)
+		
+		try:
+			result = chr(value)
+		except ValueError:
+			Error.exit(Error.string, "INT2CHARS invalid character code")
+			
+		Interpret.valStack.push(result)
+		
+		
+	# --- Instrcution STRI2INTS ---
+	def __STRI2INTS(self):
+		"""@see zadani.pdf"""
+		
+		self.__checkArguments()
+		
+		position = Interpret.valStack.pop()	# Position is on top of the stack
+		string = Interpret.valStack.pop()
+		
+		# -- Check types --
+		if type(string) != str or type(position) != int:
+			Error.exit(Error.operands, "Unexpected type of value on the stack")
+			
+		self.__checkPosition(string, position, "STRI2INTS")
+			
+		Interpret.valStack.push(ord(string[position]))
+		
+		
+	# --- Instrcutions JUMPIFEQS & JUMPIFNEQS ---
+	def __JUMPIFEQS_JUMPIFNEQS(self, expectedResult):
+		"""@see zadani.pdf"""
+		
+		self.__checkArguments(label)
+		
+		valueA, valueB = self.__popOperands(2, None)
+		
+		# -- Jump if condition is met --
+		if (valueA == valueB) == expectedResult:
+			Labels.jump(self.args[0])
+		
+		
+	# === Variants of instructions with operands of known type (@see Types) ===
+	
+	# --- Value of operand ---
+	def __valueTyped(self, arg):
+		"""Returns value of the operand without checking its type"""
+		
+		if type(arg) == var:
+			return arg.getValue()
+			
+		return arg
+		
+		
+	# --- Instrcutions ADD, SUB, MUL and CONCAT ---
+	def __ARITHMETIC_TYPED(self, operation):
+		"""@see zadani.pdf"""
+		
+		result = operation(self.__valueTyped(self.args[1]), self.__valueTyped(self.args[2]))
+		self.args[0].setValue(result)
+		
+		
+	# --- Instrcution IDIV ---
+	def __IDIV_TYPED(self):
+		"""@see zadani.pdf"""
+		
+		valueB = self.__valueTyped(self.args[2])
+		
+		# -- Check for zero divide --
+		if valueB == 0:
+			Error.exit(Error.zeroDivide, "Tried to divide by zero")
+			
+		self.args[0].setValue(self.__valueTyped(self.args[1]) // valueB)
+		
+		
+	# --- Instrcution LT/EQ/GT ---
+	def __LT_EQ_GT_TYPED(self, operation):
+		"""@see zadani.pdf"""
+		
+		valueA = self.__valueTyped(self.args[1])
+		valueB = self.__valueTyped(self.args[2])
+		
+		if operation == "LT":
+			result = valueA < valueB
+		elif operation == "EQ":
+			result = valueA == valueB
+		else:
+			result = valueA > valueB
+			
+		self.args[0].setValue(result)
+		
 		
+	# --- Instrcutions JUMPIFEQ & JUMPIFNEQ ---
+	def __JUMPIFEQ_JUMPIFNEQ_TYPED(self, expectedResult):
+		"""@see zadani.pdf"""
 		
+		if (self.__valueTyped(self.args[1]) == self.__valueTyped(self.args[2])) == expectedResult:
+			Labels.jump(self.args[0])
+			
+			
+	# === Methods executing every instruction ===
+	handlers = {
+		"DEFVAR": __DEFVAR,
+		"ADD": __ADD,
+		"SUB": __SUB,
+		"MUL": __MUL,
+		"IDIV": __IDIV,
+		"WRITE": __WRITE,
+		"MOVE": __MOVE,
+		"PUSHS": __PUSHS,
+		"POPS": __POPS,
+		"STRLEN": __STRLEN,
+		"CONCAT": __CONCAT,
+		"GETCHAR": __GETCHAR,
+		"SETCHAR": __SETCHAR,
+		"TYPE": __TYPE,
+		"AND": __AND,
+		"OR": __OR,
+		"NOT": __NOT,
+		"LT": lambda self: self.__LT_EQ_GT("LT"),
+		"EQ": lambda self: self.__LT_EQ_GT("EQ"),
+		"GT": lambda self: self.__LT_EQ_GT("GT"),
+		"INT2CHAR": __INT2CHAR,
+		"STRI2INT": __STRI2INT,
+		"READ": __READ,
+		"LABEL": lambda self: Loops.enter(self.index),	# Label is already loaded by Interpret.__findLabels()
+		"JUMP": __JUMP,
+		"JUMPIFEQ": lambda self: self.__JUMPIFEQ_JUMPIFNEQ(True),
+		"JUMPIFNEQ": lambda self: self.__JUMPIFEQ_JUMPIFNEQ(False),
+		"DPRINT": __DPRINT,
+		"BREAK": __BREAK,
+		"CREATEFRAME": __CREATEFRAME,
+		"PUSHFRAME": __PUSHFRAME,
+		"POPFRAME": __POPFRAME,
+		"CALL": __CALL,
+		"RETURN": __RETURN,
+		"CLEARS": __CLEARS,
+		"ADDS": __ADDS,
+		"SUBS": __SUBS,
+		"MULS": __MULS,
+		"IDIVS": __IDIVS,
+		"LTS": lambda self: self.__LTS_EQS_GTS("LTS"),
+		"EQS": lambda self: self.__LTS_EQS_GTS("EQS"),
+		"GTS": lambda self: self.__LTS_EQS_GTS("GTS"),
+		"ANDS": __ANDS,
+		"ORS": __ORS,
+		"NOTS": __NOTS,
+		"INT2CHARS": __INT2CHARS,
+		"STRI2INTS": __STRI2INTS,
+		"JUMPIFEQS": lambda self: self.__JUMPIFEQS_JUMPIFNEQS(True),
+		"JUMPIFNEQS": lambda self: self.__JUMPIFEQS_JUMPIFNEQS(False)
+	}
+	
+	# === Methods executing instructions with operands of known type (@see Types) ===
+	typedHandlers = {
+		"ADD": lambda self: self.__ARITHMETIC_TYPED(int.__add__),
+		"SUB": lambda self: self.__ARITHMETIC_TYPED(int.__sub__),
+		"MUL": lambda self: self.__ARITHMETIC_TYPED(int.__mul__),
+		"IDIV": __IDIV_TYPED,
+		"CONCAT": lambda self: self.__ARITHMETIC_TYPED(str.__add__),
+		"LT": lambda self: self.__LT_EQ_GT_TYPED("LT"),
+		"EQ": lambda self: self.__LT_EQ_GT_TYPED("EQ"),
+		"GT": lambda self: self.__LT_EQ_GT_TYPED("GT"),
+		"JUMPIFEQ": lambda self: self.__JUMPIFEQ_JUMPIFNEQ_TYPED(True),
+		"JUMPIFNEQ": lambda self: self.__JUMPIFEQ_JUMPIFNEQ_TYPED(False)
+	}
+	
+	opCodeNames = tuple(handlers) + tuple(typedHandlers)	# opCode of every code stored in Program
+	opCodes = dict(zip(handlers, range(len(handlers))))	# Code of every opCode
+	typedCodes = dict(zip(typedHandlers, range(len(handlers), len(opCodeNames))))	# Code of variant without type checks
+	codeHandlers = tuple(handlers.values()) + tuple(typedHandlers.values())	# Method of every code
+	
+	
 main()
@@ -231,6 +231,19 @@
 				case "POPFRAME":
 				case "RETURN":
 				case "BREAK":
+				case "CLEARS":
+				case "ADDS":
+				case "SUBS":
+				case "MULS":
+				case "IDIVS":
+				case "LTS":
+				case "GTS":
+				case "EQS":
+				case "ANDS":
+				case "ORS":
+				case "NOTS":
+				case "INT2CHARS":
+				case "STRI2INTS":
 				break;
 				
 				// <var>
@@ -243,6 +256,8 @@
 				case "CALL":
 				case "LABEL":
 				case "JUMP":
+				case "JUMPIFEQS":
+				case "JUMPIFNEQS":
 					$this->arg[0] = new LabelArgument;
 				break;
 				
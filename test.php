@@ -18,13 +18,14 @@
 		public $recursive = false;
 		public $parsePath = "./parse.php";
 		public $interpretPath = "./interpret.py";
+		public $force = false;
 		
 		public function __construct()
 		{
 			global $argc;
 			
 			// --- Read arguments ---
-			$options = array("help", "directory:", "recursive", "parse-script:", "int-script:");
+			$options = array("help", "directory:", "recursive", "parse-script:", "int-script:", "force");
 			$usedOptions = getopt(null, $options);
 			
 			// --- Process --help option ---
@@ -53,6 +54,9 @@
 				
 			if(isset($usedOptions["int-script"]))
 				$this->interpretPath = $usedOptions["int-script"];
+				
+			if(isset($usedOptions["force"]))
+				$this->force = true;
 		}
 	}
 	
@@ -61,6 +65,9 @@
 		private $arguments;
 		private $folders;
 		private $results;
+		private $cache;	// Results of previous runs indexed by test path
+		private $cachePath;
+		private $version;	// Hash of parser and interpret used for the results
 		
 		public function __construct()
 		{
@@ -68,7 +75,51 @@
 			$this->folders = array();
 			$this->results = array();
 			
+			$this->loadCache();
 			$this->scan($this->arguments->testDir);
+			$this->saveCache();
+		}
+		
+		/**
+		 * @brief Loads results of previous runs (ignored when --force is used)
+		 */
+		private function loadCache()
+		{
+			$this->cachePath = $this->arguments->testDir.".testcache";
+			$this->cache = array();
+			$this->version = sha1(@sha1_file($this->arguments->parsePath).@sha1_file($this->arguments->interpretPath));
+			
+			if($this->arguments->force == true || !file_exists($this->cachePath))
+				return;
+				
+			$cache = json_decode(file_get_contents($this->cachePath), true);
+			if(is_array($cache))
+				$this->cache = $cache;
+		}
+		
+		/**
+		 * @brief Saves results of this run so unchanged tests are skipped next time
+		 */
+		private function saveCache()
+		{
+			if(!file_exists($this->arguments->testDir))
+				return;
+				
+			@file_put_contents($this->cachePath, json_encode($this->cache));
+		}
+		
+		/**
+		 * @brief Computes key identifying test files content and tested scripts version
+		 * @param path	Path to the test without suffix
+		 * @return Hash of the test
+		 */
+		private function testKey($path)
+		{
+			$key = $this->version;
+			foreach(array(".src", ".in", ".out", ".rc", ".args", ".xml") as $suffix)
+				$key .= @sha1_file($path.$suffix);	// Files .args and .xml are optional
+				
+			return sha1($key);
 		}
 		
 		private function scan($dir)
@@ -144,6 +195,16 @@
 			}		
 			
 			
+			// --- Reuse result of unchanged test ---
+			$key = $this->testKey($path);
+			if(isset($this->cache[$path]) && $this->cache[$path]["key"] == $key)
+			{
+				$result = $this->cache[$path]["result"];
+				$this->saveResult($folderID, $name, $result[0], $result[1], $result[2]);
+				return;
+			}
+			
+			
 			// --- Check .in file ---
 			exec("php5.6 ".$this->arguments->parsePath." <\"$path.src\" >\"$path.tmp.in\"");
 			exec("diff -q \"$path.in\" \"$path.tmp.in\"", $dump, $diff);
@@ -154,8 +215,16 @@
 				$in = "NOK";
 			unset($diff);
 			
+			// --- Load extra interpret arguments (%DIR% is replaced by directory of the test) ---
+			$args = "";
+			if(file_exists($path.".args"))
+				$args = " ".str_replace("%DIR%", $dir, trim(file_get_contents($path.".args")));
+			
+			// --- Choose interpret input (hand-written .xml for programs parse.php refuses) ---
+			$source = file_exists($path.".xml") ? "$path.xml" : "$path.tmp.in";
+			
 			// --- Check .rc file ---	
-			exec("python3.6 ".$this->arguments->interpretPath." --source=\"$path.tmp.in\" >\"$path.tmp.out\"", $dump, $diff);
+			exec("python3.6 ".$this->arguments->interpretPath." --source=\"$source\"$args >\"$path.tmp.out\"", $dump, $diff);
 			exec("printf $diff | diff -q - \"$path.rc\"", $dump, $diff);	
 			if($diff == 0)
 				$rc = "OK";
@@ -178,6 +247,12 @@
 				
 				
 			// --- Save results ---
+			$this->cache[$path] = array("key" => $key, "result" => array($in, $out, $rc));
+			$this->saveResult($folderID, $name, $in, $out, $rc);
+		}
+		
+		private function saveResult($folderID, $name, $in, $out, $rc)
+		{
 			$this->results[$folderID][] = array($name, $in, $out, $rc);
 			$this->folders[$folderID]["total"]++;
 			if($in == "OK" && $out == "OK" && $rc == "OK")
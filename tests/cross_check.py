@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+
+"""Differential check of interpret.py optimizations
+Every program is run by the reference engine (--reference: -O0 with new frames and argument
+checks on every execution) and by the fast path (-O2), both without tracing, so the fast path
+runs in the production loop. Exit code, output, error output and final frames and stacks must
+be the same, otherwise both engines run the program again with --trace and their traces are
+compared to find the first divergence. Both engines still share decoding to columns and dispatch of instructions by
+their codes, so bugs there can't be found by this check.
+@author Jiri Furda (xfurda00)
+"""
+
+
+# Libraries
+import sys
+import os
+import json
+import tempfile
+import subprocess
+
+
+# === Main function ===
+def main():
+	"""Main function of the cross check"""
+	
+	# --- Check arguments ---
+	processProgramArguments()
+	
+	# --- Find programs ---
+	programs = []	# Name, path to source and path to STDIN of every program
+	if Options.sourcePath != None:
+		programs.append((Options.sourcePath, Options.sourcePath, Options.inputPath))
+		
+	if Options.directory != None:
+		programs.extend(findTests(Options.directory, Options.recursive))
+		
+	# --- Check every program ---
+	diverged = 0
+	with tempfile.TemporaryDirectory() as tempDir:
+		for seed in range(1, Options.generate+1):
+			path = os.path.join(tempDir, "generated.xml")
+			generate(seed, path)
+			diverged = diverged + CrossCheck(tempDir).check("generated --seed={0}".format(seed), path, None)
+			
+		for name, path, inputPath in programs:
+			diverged = diverged + CrossCheck(tempDir).check(name, path, inputPath)
+			
+	# --- Summary ---
+	print("Checked {0}, diverged {1}".format(len(programs)+Options.generate, diverged))
+	sys.exit(0 if diverged == 0 else 1)
+	
+	
+# === Other functions ===
+def processProgramArguments():
+	"""Checks and process cross check's start parameters
+	Results are saved to class Options
+	"""
+	
+	# --- Print argument "--help" ---
+	if len(sys.argv) == 2 and sys.argv[1] == "--help":
+		print("This program compares results of interpret.py as reference engine (--reference) and with optimizations (-O2)")
+		print("Usage:")
+		print("python3.6 cross_check.py [options]")
+		print("Options:")
+		print("  --source=<file>          Check program (XML or source code)")
+		print("  --input=<file>           STDIN of program given by --source (default empty)")
+		print("  --directory=<dir>        Check every test (.src, parsed .in or hand-written .xml) in the directory")
+		print("  --recursive              Search tests also in subdirectories")
+		print("  --generate=<N>           Check N programs from generate_program.py (seeds 1 to N)")
+		print("  --instructions=<N>       Instructions of every generated program (default 1000)")
+		print("  --interpret=<file>       Checked interpret (default interpret.py next to tests directory)")
+		print("  --timeout=<s>            Seconds after which a run is stopped and the program skipped (default 60)")
+		sys.exit(0)
+		
+	# --- Load every argument ---
+	for argument in sys.argv[1:]:
+		name, separator, value = argument.partition("=")
+		
+		if name == "--source" and separator != "":
+			Options.sourcePath = value
+		elif name == "--input" and separator != "":
+			Options.inputPath = value
+		elif name == "--directory" and separator != "":
+			Options.directory = value
+		elif argument == "--recursive":
+			Options.recursive = True
+		elif name in ("--generate", "--instructions", "--timeout") and separator != "" and value.isdigit():
+			setattr(Options, name[2:], int(value))
+		elif name == "--interpret" and separator != "":
+			Options.interpretPath = value
+		else:
+			argumentError("Invalid argument")
+			
+	# --- Check required arguments ---
+	if Options.sourcePath == None and Options.directory == None and Options.generate == 0:
+		argumentError("One of arguments --source, --directory and --generate is required")
+		
+	if Options.inputPath != None and Options.sourcePath == None:
+		argumentError("Argument --input requires --source")
+		
+	if Options.recursive and Options.directory == None:
+		argumentError("Argument --recursive requires --directory")
+		
+		
+def argumentError(msg):
+	"""Prints error message to STDERR and ends with invalid argument return code"""
+	
+	print("ERROR: {0}".format(msg), file=sys.stderr)
+	sys.exit(10)
+	
+	
+def findTests(directory, recursive):
+	"""Returns name, path to source and path to STDIN of every test in the directory (like test.php)"""
+	
+	tests = []
+	for root, dirs, files in os.walk(directory):
+		dirs.sort()
+		for file in sorted(files):
+			if file[-4:] != ".src":
+				continue
+				
+			name = os.path.join(root, file[:-4])
+			if os.path.isfile(name+".xml"):
+				tests.append((name, name+".xml", None))	# Hand-written XML of program parse.php refuses
+			elif os.path.isfile(name+".in"):
+				tests.append((name, name+".in", None))	# Source parsed to XML like test.php uses it
+			else:
+				tests.append((name, name+".src", None))
+				
+		if not recursive:
+			break
+			
+	return tests
+	
+	
+def generate(seed, path):
+	"""Writes program from generate_program.py with given seed to the file"""
+	
+	generator = os.path.join(os.path.dirname(os.path.abspath(__file__)), "generate_program.py")
+	arguments = ["--seed={0}".format(seed), "--instructions={0}".format(Options.instructions), "--output="+path]
+	
+	if subprocess.call([sys.executable, generator] + arguments) != 0:
+		print("ERROR: Couldn't generate program", file=sys.stderr)
+		sys.exit(99)
+		
+		
+# === Classes ===
+class Options:
+	"""Class used to store cross check's start parameters"""
+	
+	sourcePath = None
+	inputPath = None
+	directory = None
+	recursive = False
+	generate = 0	# Count of generated programs
+	instructions = 1000	# Instructions of every generated program
+	timeout = 60	# Seconds of every run (programs which finish only when optimized are skipped)
+	interpretPath = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "interpret.py")
+	
+	
+class CrossCheck:
+	"""Class running one program by both engines and comparing their results"""
+	
+	engines = ("reference", "fast")
+	levels = {"reference": "--reference", "fast": "-O2"}
+	
+	
+	def __init__(self, tempDir):
+		"""Prepares paths of traces and states of both engines"""
+		
+		self.tracePaths = {engine: os.path.join(tempDir, engine+".trace") for engine in self.engines}
+		self.statePaths = {engine: os.path.join(tempDir, engine+".state") for engine in self.engines}
+		
+		
+	def check(self, name, path, inputPath):
+		"""Runs program by both engines, prints differences and returns 1 when they diverged"""
+		
+		# --- Run both engines ---
+		results = {engine: self.__run(engine, path, inputPath, False) for engine in self.engines}
+		reference, fast = results["reference"], results["fast"]
+		
+		if reference == None or fast == None:
+			print("SKIPPED {0} (run longer than {1} s)".format(name, Options.timeout))
+			return 0
+		
+		# --- Compare results ---
+		differences = []
+		if reference[0] != fast[0]:
+			differences.append("exit code: reference {0}, fast {1}".format(reference[0], fast[0]))
+		if reference[1] != fast[1]:
+			differences.append("output differs")
+		if reference[2] != fast[2]:
+			differences.append("error output: reference {0!r}, fast {1!r}".format(reference[2], fast[2]))
+		if reference[3] != fast[3]:
+			differences.append("final state: reference {0}, fast {1}".format(reference[3], fast[3]))
+			
+		if len(differences) == 0:
+			print("OK {0}".format(name))
+			return 0
+			
+		# --- Find the first divergent instruction by traced runs ---
+		if all(self.__run(engine, path, inputPath, True) != None for engine in self.engines):
+			divergence = self.__findDivergence(self.__findLoops(path))
+			if divergence != None:
+				differences.append(divergence)
+				
+		# --- Print differences ---
+		print("DIVERGED {0}".format(name))
+		for difference in differences:
+			print("  {0}".format(difference))
+			
+		return 1
+		
+		
+	def __run(self, engine, path, inputPath, traced):
+		"""Runs program by the engine, returns its exit code, output, error output and final state
+		(None when it timed out), traced run also writes trace of every instruction
+		"""
+		
+		arguments = [sys.executable, Options.interpretPath, "--source="+path, self.levels[engine], "--state="+self.statePaths[engine]]
+		if traced:
+			arguments.append("--trace="+self.tracePaths[engine])
+			
+		# --- Remove results of previous run ---
+		for resultPath in (self.statePaths[engine], self.tracePaths[engine]):
+			if os.path.isfile(resultPath):
+				os.remove(resultPath)
+				
+		# --- Run ---
+		with open(inputPath if inputPath != None else os.devnull, "rb") as stdin:
+			try:
+				process = subprocess.run(arguments, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=Options.timeout)
+			except subprocess.TimeoutExpired:
+				return None
+				
+		# --- Load final state (missing when program wasn't loaded) ---
+		state = None
+		if os.path.isfile(self.statePaths[engine]):
+			with open(self.statePaths[engine]) as file:
+				state = json.load(file)
+				
+		return process.returncode, process.stdout, process.stderr, state
+		
+		
+	@staticmethod
+	def __findLoops(path):
+		"""Returns order of the last instruction of every counting loop computed at once by the fast path
+		by order of its LABEL (@see interpret.py --dump-ir)
+		"""
+		
+		arguments = [sys.executable, Options.interpretPath, "--source="+path, CrossCheck.levels["fast"], "--dump-ir"]
+		try:
+			process = subprocess.run(arguments, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=Options.timeout)
+		except subprocess.TimeoutExpired:
+			return {}
+			
+		loops = {}
+		for line in process.stdout.decode("utf-8", "replace").splitlines():
+			words = line.split()
+			if len(words) == 9 and words[1] == "LABEL" and words[3:8] == [";", "counting", "loop", "to", "order"]:	# e.g. 7 LABEL loop ; counting loop to order 11
+				loops[int(words[0])] = int(words[8])
+				
+		return loops
+		
+		
+	def __findDivergence(self, loops):
+		"""Compares traces and returns description of the first divergent instruction (None when there is none)
+		Fast path skips passes of counting loops computed at once, so when records differ right after
+		LABEL of such loop, instructions of the loop are skipped in the reference trace until the record
+		fast path continued with. Records differing anywhere else are reported.
+		"""
+		
+		if not all(os.path.isfile(path) for path in self.tracePaths.values()):
+			return None
+			
+		with open(self.tracePaths["reference"]) as reference, open(self.tracePaths["fast"]) as fast:
+			previous = None	# Last record both engines executed the same way
+			
+			for fastRecord in fast:
+				referenceRecord = reference.readline()
+				if referenceRecord == fastRecord:
+					previous = fastRecord
+					continue
+					
+				# -- Skip passes of counting loop fast path computed at once --
+				start = json.loads(previous) if previous != None else None
+				if referenceRecord != "" and start != None and start["opcode"] == "LABEL" and start["order"] in loops:
+					inLoop = lambda record: start["order"] <= json.loads(record)["order"] <= loops[start["order"]]
+					skipped = referenceRecord
+					while skipped != "" and skipped != fastRecord and inLoop(skipped):
+						skipped = reference.readline()
+						
+					if skipped == fastRecord:
+						previous = fastRecord
+						continue
+						
+				return self.__describe(previous, referenceRecord, fastRecord)
+				
+			# -- Fast path ended sooner --
+			referenceRecord = reference.readline()
+			if referenceRecord != "":
+				return self.__describe(previous, referenceRecord, "")
+				
+		return None
+		
+		
+	@staticmethod
+	def __describe(previous, referenceRecord, fastRecord):
+		"""Returns description of divergence of trace records
+		Operands are traced before execution, so wrong result of an instruction shows up
+		in the first instruction reading it.
+		"""
+		
+		# --- Instruction with different operands (or executed only by one engine) ---
+		record = json.loads(fastRecord or referenceRecord)
+		lines = ["first divergent instruction: order {0} ({1})".format(record["order"], record["opcode"])]
+		
+		# --- Last instruction both engines executed the same way ---
+		if previous != None:
+			record = json.loads(previous)
+			lines.append("    after order {0} ({1}) executed the same way".format(record["order"], record["opcode"]))
+			
+		lines.append("    reference: {0}".format(referenceRecord.strip() or "end of program"))
+		lines.append("    fast:      {0}".format(fastRecord.strip() or "end of program"))
+		return "\n".join(lines)
+		
+		
+main()
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+
+"""Generator of random valid IPPcode18 programs of given size and shape for stress and scaling tests
+Same seed and options always produce the same program. Generated programs never end
+with a runtime error and every loop has known trip count.
+@author Jiri Furda (xfurda00)
+"""
+
+
+# Libraries
+import sys
+import re
+import random
+from xml.sax.saxutils import escape
+
+
+# === Main function ===
+def main():
+	"""Main function of the generator"""
+	
+	# --- Check arguments ---
+	processProgramArguments()
+	
+	# --- Open output ---
+	if Options.outputPath == None:
+		output = sys.stdout
+	else:
+		try:
+			output = open(Options.outputPath, "w", buffering=1024*1024)
+		except OSError:
+			print("ERROR: Couldn't open output file", file=sys.stderr)
+			sys.exit(12)
+			
+	# --- Generate program ---
+	writer = XmlWriter(output) if Options.format == "xml" else SourceWriter(output)
+	Generator(writer).generate()
+	writer.close()
+	
+	output.close()
+	sys.exit(0)
+	
+	
+# === Other functions ===
+def processProgramArguments():
+	"""Checks and process generator's start parameters
+	Results are saved to class Options
+	"""
+	
+	# --- Print argument "--help" ---
+	if len(sys.argv) == 2 and sys.argv[1] == "--help":
+		print("This program generates random IPPcode18 programs parsed to XML or as source code")
+		print("Usage:")
+		print("python3.6 generate_program.py [options]")
+		print("Options:")
+		print("  --seed=<N>               Seed of the random generator (default 0)")
+		print("  --instructions=<N>       Count of instructions (default 1000, at least the declarations are generated)")
+		print("  --label-density=<N>      Labels per 100 instructions (default 5)")
+		print("  --call-depth=<N>         Count of functions calling each other (default 3)")
+		print("  --variables=<N>          Count of global variables, at least 3 (default 12)")
+		print("  --string-length=<N>      Maximal length of string literals (default 10)")
+		print("  --loop-density=<N>       Percent of instructions inside loops (default 10)")
+		print("  --loop-trips=<N>         Iterations of every loop (default 10)")
+		print("  --format=<xml|src>       Output XML like parse.php or source code (default xml)")
+		print("  --output=<file>          Write program to file instead of STDOUT")
+		sys.exit(0)
+		
+	# --- Load every argument ---
+	numeric = {
+		"--seed=": "seed",
+		"--instructions=": "instructions",
+		"--label-density=": "labelDensity",
+		"--call-depth=": "callDepth",
+		"--variables=": "variables",
+		"--string-length=": "stringLength",
+		"--loop-density=": "loopDensity",
+		"--loop-trips=": "loopTrips"
+	}
+	
+	for argument in sys.argv[1:]:
+		name, separator, value = argument.partition("=")
+		name = name + separator
+		
+		# -- Load numeric argument --
+		if name in numeric:
+			if not re.search(r"^\d+$", value):
+				argumentError("Invalid numeric argument value (given {0})".format(value))
+			setattr(Options, numeric[name], int(value))
+			
+		# -- Load argument "--format" --
+		elif name == "--format=" and value in ("xml", "src"):
+			Options.format = value
+			
+		# -- Load argument "--output" --
+		elif name == "--output=":
+			Options.outputPath = value
+			
+		# -- Check illegal argument --
+		else:
+			argumentError("Invalid argument")
+			
+	# --- Check values ---
+	if Options.variables < 3:
+		argumentError("Argument --variables must be at least 3")
+		
+	if Options.stringLength == 0 or Options.loopTrips == 0:
+		argumentError("Arguments --string-length and --loop-trips must be positive")
+		
+	if Options.labelDensity > 100 or Options.loopDensity > 100:
+		argumentError("Arguments --label-density and --loop-density can't be over 100")
+		
+		
+def argumentError(msg):
+	"""Prints error message to STDERR and ends with invalid argument return code"""
+	
+	print("ERROR: {0}".format(msg), file=sys.stderr)
+	sys.exit(10)
+	
+	
+# === Classes ===
+class Options:
+	"""Class used to store generator's start parameters"""
+	
+	seed = 0
+	instructions = 1000	# Total count of instructions
+	labelDensity = 5	# Labels per 100 instructions
+	callDepth = 3	# Count of functions, function N calls function N+1
+	variables = 12	# Count of global variables (every type gets one third)
+	stringLength = 10	# Maximal length of string literals
+	loopDensity = 10	# Percent of instructions inside loops
+	loopTrips = 10	# Iterations of every loop
+	format = "xml"
+	outputPath = None
+	
+	
+class SourceWriter:
+	"""Class writing instructions as IPPcode18 source code"""
+	
+	def __init__(self, file):
+		"""Writes header of the program"""
+		
+		self.file = file
+		self.file.write(".IPPcode18\n")
+		
+		
+	def write(self, opCode, args):
+		"""Writes instruction with arguments given as (type, value)"""
+		
+		self.file.write(" ".join([opCode] + [self.__formatArg(argType, value) for argType, value in args]) + "\n")
+		
+		
+	def close(self):
+		"""Finishes the program"""
+		
+		pass
+		
+		
+	@staticmethod
+	def __formatArg(argType, value):
+		"""Returns argument in the form used by IPPcode18 source code"""
+		
+		if argType in ("int", "bool", "string"):
+			return "{0}@{1}".format(argType, value)
+			
+		return value
+		
+		
+class XmlWriter:
+	"""Class writing instructions as XML in the same form as parse.php"""
+	
+	def __init__(self, file):
+		"""Writes header of the program"""
+		
+		self.file = file
+		self.order = 0
+		self.file.write("<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<program language=\"IPPcode18\">\n")
+		
+		
+	def write(self, opCode, args):
+		"""Writes instruction with arguments given as (type, value)"""
+		
+		self.order = self.order+1
+		
+		if len(args) == 0:
+			self.file.write("  <instruction order=\"{0}\" opcode=\"{1}\"/>\n".format(self.order, opCode))
+			return
+			
+		lines = ["  <instruction order=\"{0}\" opcode=\"{1}\">".format(self.order, opCode)]
+		for number, (argType, value) in enumerate(args, 1):
+			lines.append("    <arg{0} type=\"{1}\">{2}</arg{0}>".format(number, argType, escape(value)))
+		lines.append("  </instruction>\n")
+		self.file.write("\n".join(lines))
+		
+		
+	def close(self):
+		"""Finishes the program"""
+		
+		self.file.write("</program>\n")
+		
+		
+class Generator:
+	"""Class generating the program
+	
+	Layout: declarations of global variables, main body, call of the first
+	function, writes of every variable and functions after JUMP to the end.
+	Variables keep their type (int, string, bool) and strings are never empty,
+	so every generated instruction is valid.
+	"""
+	
+	callSize = 6	# Instructions calling a function (@see __call)
+	alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+	
+	
+	def __init__(self, writer):
+		"""Prepares variables of every type"""
+		
+		self.writer = writer
+		self.random = random.Random(Options.seed)
+		
+		names = ["GF@v{0}".format(number) for number in range(Options.variables)]
+		self.ints = names[0::3]
+		self.strings = names[1::3]
+		self.bools = names[2::3]
+		self.counters = ["GF@i{0}".format(number) for number in range(Options.callDepth+1)]	# Loop counter of main and of every function
+		
+		self.labels = 0	# Count of generated labels
+		self.emitted = 0	# Count of generated instructions in bodies
+		self.looped = 0	# Count of generated instructions inside loops
+		
+		
+	def generate(self):
+		"""Generates whole program"""
+		
+		# --- Compute size of bodies ---
+		routines = Options.callDepth+1
+		fixed = 2*Options.variables + routines + 1	# Declarations and jump to the end
+		fixed = fixed + Options.callDepth*(self.callSize+2)	# Calls and LABEL and RETURN of every function
+		fixed = fixed + Options.variables + 1	# Writes of variables and final label
+		bodies = max(Options.instructions-fixed, 0)
+		
+		# --- Declarations ---
+		for name in self.ints + self.strings + self.bools:
+			self.__write("DEFVAR", ("var", name))
+		for name in self.counters:
+			self.__write("DEFVAR", ("var", name))
+			
+		for name in self.ints:
+			self.__write("MOVE", ("var", name), self.__int())
+		for name in self.strings:
+			self.__write("MOVE", ("var", name), self.__string())
+		for name in self.bools:
+			self.__write("MOVE", ("var", name), self.__bool())
+			
+		# --- Main body ---
+		self.__body(bodies//routines + bodies%routines, 0)
+		if Options.callDepth != 0:
+			self.__call(0)
+			
+		for name in self.ints + self.strings + self.bools:
+			self.__write("WRITE", ("var", name))
+			
+		self.__write("JUMP", ("label", "end"))
+		
+		# --- Functions ---
+		for level in range(Options.callDepth):
+			self.__write("LABEL", ("label", "f{0}".format(level)))
+			self.__body(bodies//routines, level+1)
+			if level+1 != Options.callDepth:
+				self.__call(level+1)
+			self.__write("RETURN")
+			
+		self.__write("LABEL", ("label", "end"))
+		
+		
+	def __body(self, size, level):
+		"""Generates body of main (level 0) or of function, exactly size instructions"""
+		
+		while size > 0:
+			# -- Loop when there are too few instructions inside loops --
+			if size >= 5 and self.looped*100 < Options.loopDensity*self.emitted:
+				length = self.random.randint(1, min(size-4, 20))
+				self.__loop(length, level)
+				size = size-length-4
+				
+			# -- Skipped region when there are too few labels --
+			elif size >= 3 and self.labels*100 < Options.labelDensity*self.emitted:
+				length = self.random.randint(1, min(size-2, 10))
+				self.__skip(length, level)
+				size = size-length-2
+				
+			else:
+				size = size-self.__statement(size, level, False)
+				
+				
+	def __loop(self, length, level):
+		"""Generates loop with body of given length"""
+		
+		name = "loop{0}".format(self.labels)
+		counter = ("var", self.counters[level])
+		
+		self.__write("MOVE", counter, ("int", "0"))
+		self.__write("LABEL", ("label", name))
+		self.labels = self.labels+1
+		
+		self.looped = self.looped+length+4
+		while length > 0:
+			length = length-self.__statement(length, level, True)
+			
+		self.__write("ADD", counter, counter, ("int", "1"))
+		self.__write("JUMPIFNEQ", ("label", name), counter, ("int", str(Options.loopTrips)))
+		
+		
+	def __skip(self, length, level):
+		"""Generates conditional jump over region of given length"""
+		
+		name = "skip{0}".format(self.labels)
+		
+		self.__write(self.random.choice(("JUMPIFEQ", "JUMPIFNEQ")), ("label", name), ("var", self.random.choice(self.bools)), ("bool", "true"))
+		while length > 0:
+			length = length-self.__statement(length, level, False)
+		self.__write("LABEL", ("label", name))
+		self.labels = self.labels+1
+		
+		
+	def __call(self, level):
+		"""Generates call of function with local variable LF@p"""
+		
+		self.__write("CREATEFRAME")
+		self.__write("DEFVAR", ("var", "TF@p"))
+		self.__write("MOVE", ("var", "TF@p"), self.__int())
+		self.__write("PUSHFRAME")
+		self.__write("CALL", ("label", "f{0}".format(level)))
+		self.__write("POPFRAME")
+		
+		
+	def __statement(self, size, level, inLoop):
+		"""Generates one or two (if size allows) instructions, returns their count"""
+		
+		choice = self.random.randrange(10 if size >= 2 else 9)
+		ints = self.ints + (["LF@p"] if level != 0 else [])
+		
+		# --- Integer result ---
+		if choice < 3:
+			dest = ("var", self.random.choice(self.ints))
+			kind = self.random.randrange(5)
+			if kind == 0:
+				self.__write(self.random.choice(("ADD", "SUB")), dest, self.__symb(ints, self.__int), self.__symb(ints, self.__int))
+			elif kind == 1:
+				self.__write("MUL", dest, self.__symb(ints, self.__int), ("int", self.random.choice(("-1", "1"))))	# Values don't grow in loops
+			elif kind == 2:
+				self.__write("IDIV", dest, self.__symb(ints, self.__int), ("int", str(self.random.randint(1, 5))))
+			elif kind == 3:
+				self.__write("STRLEN", dest, self.__symb(self.strings, self.__string))
+			else:
+				self.__write("STRI2INT", dest, self.__symb(self.strings, self.__string), ("int", "0"))
+				
+		# --- String result ---
+		elif choice < 5:
+			dest = ("var", self.random.choice(self.strings))
+			kind = self.random.randrange(5)
+			if kind == 0:
+				self.__write("CONCAT", dest, self.__string(), self.__string())	# Only literals so strings don't grow in loops
+			elif kind == 1:
+				self.__write("GETCHAR", dest, self.__symb(self.strings, self.__string), ("int", "0"))
+			elif kind == 2:
+				self.__write("SETCHAR", dest, ("int", "0"), self.__string())
+			elif kind == 3:
+				self.__write("INT2CHAR", dest, ("int", str(self.random.randint(33, 126))))
+			else:
+				self.__write("TYPE", dest, ("var", self.random.choice(ints + self.strings + self.bools)))
+				
+		# --- Bool result ---
+		elif choice < 7:
+			dest = ("var", self.random.choice(self.bools))
+			kind = self.random.randrange(3)
+			if kind == 0:
+				operands = self.random.choice(((ints, self.__int), (self.strings, self.__string), (self.bools, self.__bool)))
+				self.__write(self.random.choice(("LT", "GT", "EQ")), dest, self.__symb(*operands), self.__symb(*operands))
+			elif kind == 1:
+				self.__write(self.random.choice(("AND", "OR")), dest, self.__symb(self.bools, self.__bool), self.__symb(self.bools, self.__bool))
+			else:
+				self.__write("NOT", dest, self.__symb(self.bools, self.__bool))
+				
+		# --- Copy ---
+		elif choice < 8:
+			names = self.random.choice((self.ints, self.strings, self.bools))
+			self.__write("MOVE", ("var", self.random.choice(names)), ("var", self.random.choice(names)))
+			
+		# --- Output (not in loops, it would multiply) ---
+		elif choice < 9:
+			if inLoop:
+				self.__write("MOVE", ("var", self.random.choice(self.ints)), self.__int())
+			else:
+				self.__write("WRITE", self.__symb(ints + self.strings + self.bools, self.__string))
+				
+		# --- Data stack ---
+		else:
+			names, literal = self.random.choice(((self.ints, self.__int), (self.strings, self.__string), (self.bools, self.__bool)))
+			self.__write("PUSHS", self.__symb(names, literal))
+			self.__write("POPS", ("var", self.random.choice(names)))
+			return 2
+			
+		return 1
+		
+		
+	def __symb(self, names, literal):
+		"""Returns one of the variables or literal"""
+		
+		if self.random.randrange(3) == 0:
+			return literal()
+			
+		return ("var", self.random.choice(names))
+		
+		
+	def __int(self):
+		"""Returns random int literal"""
+		
+		return ("int", str(self.random.randint(-1000, 1000)))
+		
+		
+	def __string(self):
+		"""Returns random non-empty string literal (sometimes with escape sequence)"""
+		
+		chars = [self.random.choice(self.alphabet) for i in range(self.random.randint(1, Options.stringLength))]
+		if self.random.randrange(4) == 0:
+			chars[self.random.randrange(len(chars))] = self.random.choice(("\\032", "\\035", "\\092"))
+			
+		return ("string", "".join(chars))
+		
+		
+	def __bool(self):
+		"""Returns random bool literal"""
+		
+		return ("bool", self.random.choice(("true", "false")))
+		
+		
+	def __write(self, opCode, *args):
+		"""Writes instruction to the output"""
+		
+		self.writer.write(opCode, args)
+		self.emitted = self.emitted+1
+		
+		
+main()
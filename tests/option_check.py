@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+
+"""Tests of interpret.py features which need more runs of the same program
+or produce results other than STDOUT and return code (test.php can't check them)
+@author Jiri Furda (xfurda00)
+"""
+
+
+# Libraries
+import sys
+import os
+import json
+import tempfile
+import subprocess
+import gzip
+import lzma
+
+
+# === Main function ===
+def main():
+	"""Main function of the option tests"""
+	
+	# --- Check arguments ---
+	processProgramArguments()
+	
+	# --- Run every test ---
+	failed = 0
+	for name, test in tests:
+		with tempfile.TemporaryDirectory() as tempDir:
+			failure = test(Runner(tempDir))
+			
+		if failure == None:
+			print("OK {0}".format(name))
+		else:
+			print("FAILED {0}\n  {1}".format(name, failure))
+			failed = failed+1
+			
+	# --- Summary ---
+	print("Tested {0}, failed {1}".format(len(tests), failed))
+	sys.exit(0 if failed == 0 else 1)
+	
+	
+# === Other functions ===
+def processProgramArguments():
+	"""Checks and process start parameters
+	Results are saved to class Options
+	"""
+	
+	for argument in sys.argv[1:]:
+		if argument == "--help" and len(sys.argv) == 2:
+			print("This program tests options of interpret.py which test.php can't check")
+			print("Usage:")
+			print("python3.6 option_check.py [options]")
+			print("Options:")
+			print("  --interpret=<file>       Tested interpret (default interpret.py next to tests directory)")
+			sys.exit(0)
+		elif argument[:12] == "--interpret=":
+			Options.interpretPath = argument[12:]
+		else:
+			print("ERROR: Invalid argument", file=sys.stderr)
+			sys.exit(10)
+			
+			
+def testPath(name):
+	"""Returns path to file of the test in tests/my (e.g. "arithmetic/add.in")"""
+	
+	return os.path.join(os.path.dirname(os.path.abspath(__file__)), "my", name)
+	
+	
+def readFile(path):
+	"""Returns content of the file as bytes"""
+	
+	with open(path, "rb") as file:
+		return file.read()
+		
+		
+def programXml(instructions):
+	"""Returns XML program made of instructions given as (opcode, (type, value), ...)"""
+	
+	lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<program language="IPPcode18">']
+	for order, (opCode, *args) in enumerate(instructions, 1):
+		lines.append('<instruction order="{0}" opcode="{1}">'.format(order, opCode))
+		for number, (argType, value) in enumerate(args, 1):
+			lines.append('<arg{0} type="{1}">{2}</arg{0}>'.format(number, argType, value))
+		lines.append('</instruction>')
+		
+	lines.append('</program>')
+	return "\n".join(lines).encode()
+	
+	
+# --- Tests (each returns None or description of the failure) ---
+def testDecodeCache(runner):
+	"""Decode cache must not change result of the program, also for XML which isn't well-formed"""
+	
+	program = readFile(testPath("arithmetic/add.in"))
+	header = b'<program language="IPPcode18">'
+	variants = {
+		"well-formed": program,
+		"duplicated attribute": program.replace(header, b'<program language="IPPcode18" name="a" name="b">'),
+		"unclosed instruction": program.replace(b"</instruction>", b"", 1),
+		"order with leading zero": program.replace(b'order="1"', b'order="01"', 1)
+	}
+	
+	for name, content in variants.items():
+		path = runner.write(name+".xml", content)
+		expected = runner.run(["--source="+path])
+		cachePath = runner.path(name+".cache")
+		
+		for run in ("first", "second"):	# Cache is created by the first run and used by the second one
+			result = runner.run(["--source="+path, "--decode-cache="+cachePath])
+			if result[:2] != expected[:2]:
+				return "{0} XML, {1} run with cache: return code {2} instead of {3}".format(name, run, result[0], expected[0])
+				
+	return None
+	
+	
+def testByteOrderMark(runner):
+	"""XML starting with UTF-8 BOM is interpreted like without it"""
+	
+	program = readFile(testPath("arithmetic/add.in"))
+	expected = runner.run(["--source="+runner.write("plain.xml", program)])
+	result = runner.run(["--source="+runner.write("bom.xml", b"\xef\xbb\xbf" + program)])
+	
+	if result[:2] != expected[:2]:
+		return "return code {0} instead of {1}".format(result[0], expected[0])
+		
+	return None
+	
+	
+def testLibrary(runner):
+	"""Program linked with compiled library calls its labels, duplicated labels are semantic errors"""
+	
+	library = programXml([
+		("LABEL", ("label", "greet")), ("WRITE", ("string", "library")), ("RETURN",)
+	])
+	main = programXml([("CALL", ("label", "greet")), ("WRITE", ("string", "main"))])
+	duplicated = programXml([("LABEL", ("label", "greet")), ("LABEL", ("label", "greet"))])
+	
+	libraryPath = runner.path("greet.lib")
+	result = runner.run(["--source="+runner.write("greet.xml", library), "--compile-library="+libraryPath])
+	if result[0] != 0:
+		return "compiling library: return code {0} instead of 0".format(result[0])
+		
+	result = runner.run(["--source="+runner.write("main.xml", main), "--library="+libraryPath])
+	if result[:2] != (0, b"library\nmain\n"):
+		return "linked program: return code {0} and output {1!r}".format(result[0], result[1])
+		
+	result = runner.run(["--source="+runner.write("duplicated.xml", duplicated), "--compile-library="+runner.path("duplicated.lib")])
+	if result[0] != 52:
+		return "label duplicated in library: return code {0} instead of 52".format(result[0])
+		
+	result = runner.run(["--source="+runner.path("greet.xml"), "--library="+libraryPath])
+	if result[0] != 52:
+		return "label in both library and program: return code {0} instead of 52".format(result[0])
+		
+	return None
+	
+	
+def testInvalidLibrary(runner):
+	"""Library file which wasn't compiled by this interpret is refused without running anything from it"""
+	
+	main = runner.write("main.xml", programXml([("WRITE", ("string", "main"))]))
+	marker = runner.path("marker")
+	libraryPath = runner.path("greet.lib")
+	runner.run(["--source="+runner.write("greet.xml", programXml([("LABEL", ("label", "greet"))])), "--compile-library="+libraryPath])
+	compiled = readFile(libraryPath)
+	
+	variants = {
+		"pickle": b"cos\nsystem\n(Vtouch " + marker.encode() + b"\ntR.",
+		"garbage": b"\x00\xff library",
+		"other interpret": compiled.replace(b'"interpret": "', b'"interpret": "0'),
+		"broken columns": compiled.replace(b'"columns": [[', b'"columns": [[200, ')
+	}
+	
+	for name, content in variants.items():
+		result = runner.run(["--source="+main, "--library="+runner.write(name+".lib", content)])
+		if result[0] != 31:
+			return "{0} library: return code {1} instead of 31".format(name, result[0])
+			
+	if os.path.exists(marker):
+		return "code from pickled library was run"
+		
+	return None
+	
+	
+def testResume(runner):
+	"""Program interrupted before any of its instructions and resumed from checkpoint writes the same output"""
+	
+	path = testPath("other/resume.in")
+	expected = runner.run(["--source="+path])
+	quitPath = runner.write("quit.dbg", b"quit\n")
+	checkpointPath = runner.path("resume.checkpoint")
+	count = readFile(path).count(b"<instruction ")
+	
+	for order in range(1, count+1):	# Checkpoint is saved before the breakpoint stops the program
+		interrupted = runner.run(["--source="+path, "--checkpoint="+checkpointPath, "--checkpoint-every=1",
+			"--break={0}".format(order), "--debug-input="+quitPath])
+		resumed = runner.run(["--source="+path, "--resume="+checkpointPath])
+		
+		if (resumed[0], interrupted[1]+resumed[1]) != expected[:2]:
+			return "interrupted at order {0}: return code {1} and output {2!r}".format(order, resumed[0], interrupted[1]+resumed[1])
+			
+	return None
+	
+	
+def testCompressedInput(runner):
+	"""Program compressed by gzip or xz is interpreted like uncompressed one, corrupted archive is structure error"""
+	
+	programs = {"XML": readFile(testPath("arithmetic/add.in")), "source": readFile(testPath("arithmetic/add.src"))}
+	compressions = {"gzip": gzip.compress, "xz": lzma.compress}
+	
+	for programName, program in programs.items():
+		expected = runner.run(["--source="+runner.write("plain", program)])
+		
+		for name, compress in compressions.items():
+			content = compress(program)
+			result = runner.run(["--source="+runner.write(name, content)])
+			if result[:2] != expected[:2]:
+				return "{0} {1}: return code {2} instead of {3}".format(name, programName, result[0], expected[0])
+				
+			# -- Truncated archive and archive with damaged data --
+			for damage, damaged in (("truncated", content[:len(content)//2]), ("damaged", content[:20] + bytes(len(content)-20))):
+				result = runner.run(["--source="+runner.write(name+"."+damage, damaged)])
+				if result[0] != 31:
+					return "{0} {1} {2}: return code {3} instead of 31".format(damage, name, programName, result[0])
+					
+	return None
+	
+	
+def testTrace(runner):
+	"""Trace has a record of every executed instruction with operands read before it, filters select subsets of it"""
+	
+	path = testPath("other/resume.in")
+	expected = runner.run(["--source="+path])
+	
+	def trace(*arguments):
+		"""Returns records of the trace written with given trace options (None when output changed)"""
+		
+		tracePath = runner.path("trace.jsonl")
+		if runner.run(["--source="+path, "--trace="+tracePath] + list(arguments))[:2] != expected[:2]:
+			return None
+			
+		with open(tracePath) as file:
+			return [json.loads(line) for line in file]
+			
+	# --- Whole trace ---
+	records = trace()
+	if records == None:
+		return "tracing changed the result"
+		
+	start = [
+		{"order": 1, "opcode": "DEFVAR", "args": [None], "stack": 0, "calls": 0, "frames": 0},
+		{"order": 2, "opcode": "MOVE", "args": [None, 0], "stack": 0, "calls": 0, "frames": 0},
+		{"order": 3, "opcode": "PUSHS", "args": [100], "stack": 0, "calls": 0, "frames": 0},
+		{"order": 4, "opcode": "LABEL", "args": ["loop"], "stack": 1, "calls": 0, "frames": 0},
+		{"order": 5, "opcode": "CALL", "args": ["greet"], "stack": 1, "calls": 0, "frames": 0},
+		{"order": 12, "opcode": "CREATEFRAME", "args": [], "stack": 1, "calls": 1, "frames": 0}
+	]
+	if records[:len(start)] != start:
+		return "trace starts with {0}".format(records[:len(start)])
+		
+	if len(records) != 40 or records[-1] != {"order": 10, "opcode": "JUMP", "args": ["end"], "stack": 0, "calls": 0, "frames": 0}:
+		return "trace has {0} records and ends with {1}".format(len(records), records[-1])
+		
+	# --- Filtered traces ---
+	filters = {
+		"--trace-opcodes=write": [record for record in records if record["opcode"] == "WRITE"],
+		"--trace-labels=greet": [record for record in records if 12 <= record["order"] <= 19],
+		"--trace-every=3": records[2::3]
+	}
+	
+	for argument, selected in filters.items():
+		if trace(argument) != selected:
+			return "trace with {0} isn't subset of the whole trace".format(argument)
+			
+	return None
+	
+	
+def testProfile(runner):
+	"""Profile has collapsed call stacks of sampled instructions, most of them in the function with the loop"""
+	
+	program = programXml([
+		("DEFVAR", ("var", "GF@i")), ("DEFVAR", ("var", "GF@c")), ("CALL", ("label", "outer")),
+		("WRITE", ("var", "GF@i")), ("JUMP", ("label", "end")),
+		("LABEL", ("label", "outer")), ("CALL", ("label", "inner")), ("RETURN",),
+		("LABEL", ("label", "inner")), ("MOVE", ("var", "GF@i"), ("int", "0")),
+		("LABEL", ("label", "loop")), ("ADD", ("var", "GF@i"), ("var", "GF@i"), ("int", "1")),
+		("INT2CHAR", ("var", "GF@c"), ("int", "65")),	# Loop isn't computed at once
+		("JUMPIFNEQ", ("label", "loop"), ("var", "GF@i"), ("int", "100000")), ("RETURN",),
+		("LABEL", ("label", "end"))
+	])
+	
+	profilePath = runner.path("profile.txt")
+	result = runner.run(["--source="+runner.write("loop.xml", program), "--profile="+profilePath])
+	if result[:2] != (0, b"100000\n"):
+		return "profiled program: return code {0} and output {1!r}".format(result[0], result[1])
+		
+	# --- Check collapsed stacks ---
+	samples = {}
+	for line in readFile(profilePath).decode().splitlines():
+		names, separator, count = line.rpartition(" ")
+		if names not in ("main", "main;outer", "main;outer;inner") or not count.isdigit() or names in samples:
+			return "invalid profile line '{0}'".format(line)
+		samples[names] = int(count)
+		
+	if max(samples, key=samples.get, default=None) != "main;outer;inner":
+		return "most samples aren't in the loop: {0}".format(samples)
+		
+	return None
+	
+	
+# === Classes ===
+class Options:
+	"""Class used to store start parameters"""
+	
+	interpretPath = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "interpret.py")
+	
+	
+class Runner:
+	"""Class running interpret with files in temporary directory"""
+	
+	def __init__(self, tempDir):
+		"""Saves temporary directory of the test"""
+		
+		self.tempDir = tempDir
+		
+		
+	def path(self, name):
+		"""Returns path to file in temporary directory"""
+		
+		return os.path.join(self.tempDir, name)
+		
+		
+	def write(self, name, content):
+		"""Writes bytes to file in temporary directory and returns its path"""
+		
+		path = self.path(name)
+		with open(path, "wb") as file:
+			file.write(content)
+			
+		return path
+		
+		
+	def run(self, arguments, stdin=b""):
+		"""Runs interpret with given arguments, returns its return code, STDOUT and STDERR"""
+		
+		process = subprocess.run([sys.executable, Options.interpretPath] + arguments, input=stdin,
+			stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=60)
+			
+		return process.returncode, process.stdout, process.stderr
+		
+		
+# Tested features
+tests = [
+	("decode cache", testDecodeCache),
+	("byte order mark", testByteOrderMark),
+	("library", testLibrary),
+	("invalid library", testInvalidLibrary),
+	("resume", testResume),
+	("compressed input", testCompressedInput),
+	("trace", testTrace),
+	("profile", testProfile)
+]
+
+
+main()